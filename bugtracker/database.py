@@ -0,0 +1,67 @@
+"""
+DATABASES from the environment.
+
+DATABASE_URL             any dj-database-url URL; SQLite in BASE_DIR if unset
+DATABASE_REPLICA_URL     optional read replica, used by the list and
+                         dashboard views (see issues/replicas.py)
+DATABASE_CONN_MAX_AGE    seconds a connection is kept between requests
+                         (default 60, checked before reuse; 0 closes it
+                         after every request)
+DATABASE_POOL            1 to use psycopg 3's connection pool on PostgreSQL
+                         instead of persistent connections
+DATABASE_POOL_MIN_SIZE   connections the pool keeps open (default 2)
+DATABASE_POOL_MAX_SIZE   most connections the pool opens (default 10)
+SQLITE_WAL               0 to keep SQLite's default rollback journal
+"""
+import dj_database_url
+
+SQLITE_ENGINE = 'django.db.backends.sqlite3'
+POSTGRES_ENGINE = 'django.db.backends.postgresql'
+
+# Run on every new SQLite connection. WAL lets readers work while one
+# writer commits, which is what a single-node deployment with several
+# worker threads needs; NORMAL sync is durable under WAL except on power
+# loss, where the last transactions may roll back.
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA busy_timeout=5000',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-20000',  # KiB, i.e. about 20 MB per connection
+    'PRAGMA mmap_size=134217728',
+)
+
+
+def database_config(url, conn_max_age=60, pool=False, pool_min_size=2, pool_max_size=10, sqlite_wal=True):
+    """One DATABASES entry for url"""
+    config = dj_database_url.parse(url, conn_max_age=conn_max_age, conn_health_checks=conn_max_age != 0)
+    options = config.setdefault('OPTIONS', {})
+    if config['ENGINE'] == SQLITE_ENGINE and sqlite_wal:
+        options['init_command'] = ';'.join(SQLITE_PRAGMAS)
+        # Take the write lock up front instead of failing to upgrade a
+        # read lock with "database is locked" when writers collide
+        options['transaction_mode'] = 'IMMEDIATE'
+    elif config['ENGINE'] == POSTGRES_ENGINE and pool:
+        # Django refuses persistent connections alongside its pool
+        config['CONN_MAX_AGE'] = 0
+        config['CONN_HEALTH_CHECKS'] = False
+        options['pool'] = {'min_size': pool_min_size, 'max_size': pool_max_size, 'timeout': 10}
+    return config
+
+
+def databases_from_env(environ, default_url):
+    """The DATABASES setting for the variables in environ"""
+    options = {
+        'conn_max_age': int(environ.get('DATABASE_CONN_MAX_AGE', 60)),
+        'pool': environ.get('DATABASE_POOL') == '1',
+        'pool_min_size': int(environ.get('DATABASE_POOL_MIN_SIZE', 2)),
+        'pool_max_size': int(environ.get('DATABASE_POOL_MAX_SIZE', 10)),
+        'sqlite_wal': environ.get('SQLITE_WAL', '1') != '0',
+    }
+    databases = {'default': database_config(environ.get('DATABASE_URL') or default_url, **options)}
+    replica_url = environ.get('DATABASE_REPLICA_URL')
+    if replica_url:
+        databases['replica'] = database_config(replica_url, **options)
+        # Tests read the replica through the default connection
+        databases['replica']['TEST'] = {'MIRROR': 'default'}
+    return databases
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 import os
 
+from .database import databases_from_env
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -43,6 +45,7 @@ INSTALLED_APPS = [
     # Third party apps
     'crispy_forms',
     'crispy_bootstrap5',
+    'rest_framework',
 
     # Local apps
     'issues',
@@ -50,6 +53,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'issues.instrumentation.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,13 +69,20 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Compile each template once per process, with DEBUG on too (the
+            # dev server's autoreloader clears it when a template changes)
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -82,13 +93,53 @@ WSGI_APPLICATION = 'bugtracker.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Configured from DATABASE_URL and friends; see bugtracker/database.py
+DATABASES = databases_from_env(os.environ, f'sqlite:///{BASE_DIR / "db.sqlite3"}')
+DATABASE_ROUTERS = ['issues.replicas.ReplicaRouter']
+# After a write, a user's replica-routed views read from the primary for
+# this long; keep it above the replica's usual lag (see issues/replicas.py)
+REPLICA_PIN_SECONDS = 10
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# The default cache holds the per-user dashboard stats, the template
+# fragments and the content versions the dashboard's fragments are keyed
+# on, all of which the Issue and Project signals invalidate. It has to be
+# shared by every worker process or the others keep serving stale totals
+# and cards. A directory works on one host; set REDIS_URL when the app
+# runs on several.
+if os.environ.get('REDIS_URL'):
+    DEFAULT_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+else:
+    DEFAULT_CACHE = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('DEFAULT_CACHE_DIR', BASE_DIR / '.cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
     }
+
+CACHES = {
+    'default': DEFAULT_CACHE,
+    # Shared between gunicorn workers so one worker's analysis is a hit for all
+    'analysis': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('ANALYSIS_CACHE_DIR', BASE_DIR / '.analysis_cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
 }
 
+# Tests run against local-memory caches instead (see bugtracker/test_runner.py)
+TEST_RUNNER = 'bugtracker.test_runner.TestRunner'
+
+# Analysis result cache (see issues/analysis_cache.py)
+ANALYSIS_CACHE_ALIAS = 'analysis'
+ANALYSIS_CACHE_MAX_ENTRIES = 512
+ANALYSIS_CACHE_TIMEOUT = 60 * 60 * 24
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -139,3 +190,108 @@ LOGOUT_REDIRECT_URL = 'home'
 
 # OpenAI API Key (For AI Analysis)
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', 'your-api-key-here')
+
+# AI analysis client (see issues/ai.py). Set AI_BASE_URL to a running
+# `manage.py ai_stub_server` to develop and benchmark offline.
+AI_PROVIDER = 'issues.ai.OpenAIChatProvider'
+AI_BASE_URL = os.environ.get('AI_BASE_URL', 'https://api.openai.com/v1')
+AI_MODEL = 'gpt-3.5-turbo'
+AI_MAX_CONCURRENCY = 4
+AI_RATE_LIMIT = 3.0  # requests per second, shared by the whole process
+AI_RATE_BURST = 5
+AI_MAX_RETRIES = 4
+AI_RETRY_BACKOFF = 0.5
+AI_TIMEOUT = 30
+AI_CHUNK_LINES = 200
+AI_CACHE_ALIAS = 'analysis'
+AI_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+# Language backends for code analysis, each imported the first time its
+# language is analyzed. Installed packages can add languages through the
+# "bugtracker.analyzers" entry point group; entries here win.
+ANALYZERS = {
+    'python': 'issues.analyzers.python.PythonAnalyzer',
+    'javascript': 'issues.analyzers.javascript.JavaScriptAnalyzer',
+    'java': 'issues.analyzers.java.JavaAnalyzer',
+    'cpp': 'issues.analyzers.cpp.CppAnalyzer',
+    'html': 'issues.analyzers.html.HTMLAnalyzer',
+}
+
+# Background code analysis (see issues/jobs.py)
+ANALYSIS_WORKERS = 4
+ANALYSIS_JOBS_EAGER = False
+ANALYSIS_JOB_TIMEOUT = 300
+# Seconds the status endpoint tells polling clients to wait between polls
+ANALYSIS_STATUS_RETRY_AFTER = 2
+# Server-sent progress events (see issues/events.py), which the results
+# page follows while an analysis runs. Under WSGI every open stream holds
+# a worker thread until the analysis is done or the timeout passes.
+ANALYSIS_EVENTS_HEARTBEAT = 15
+ANALYSIS_EVENTS_TIMEOUT = 300
+ANALYSIS_EVENTS_CHANNELS = 256
+ANALYSIS_EVENTS_BACKLOG = 1000
+ANALYSIS_BULK_BATCH_SIZE = 500
+# Fraction of jobs whose analysis is profiled rule by rule; see
+# issues/profiling.py
+ANALYSIS_PROFILE_SAMPLE_RATE = 0.0
+
+# Budgeted analysis (see issues/sandbox.py): with ANALYSIS_SANDBOX on, jobs
+# analyze in killable worker processes and keep partial findings when a
+# snippet runs out of time. Lines longer than ANALYSIS_MAX_LINE_LENGTH are
+# never analyzed.
+ANALYSIS_SANDBOX = not DEBUG
+ANALYSIS_SANDBOX_WORKERS = 2
+ANALYSIS_TIME_BUDGET = 10  # wall-clock seconds per snippet
+ANALYSIS_CPU_BUDGET = 5  # CPU seconds per snippet
+ANALYSIS_MAX_LINE_LENGTH = 2000
+ANALYSIS_BUDGET_CHUNK_LINES = 1000
+
+# Under an ASGI server (e.g. `uvicorn bugtracker.asgi:application`) set
+# ASYNC_VIEWS=1 to serve paste_code and code_results from their async
+# variants, which analyze on the event loop without holding a thread per
+# paste, and to stream analysis events without a thread per open stream.
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS') == '1'
+ASYNC_ANALYSIS_THREADS = 8
+
+# Archive uploads (see issues/archives.py); None uses one process per core
+ANALYSIS_PROCESSES = None
+ANALYSIS_ARCHIVE_MAX_FILES = 2000
+ANALYSIS_ARCHIVE_MAX_FILE_SIZE = 1024 * 1024
+# Edits that change more than this fraction of a snippet's lines are
+# re-analyzed from scratch instead of incrementally.
+ANALYSIS_INCREMENTAL_MAX_CHANGE = 0.5
+
+# Bulk issue import/export: rows per INSERT transaction, and rows fetched
+# per round trip while streaming an export.
+ISSUE_IMPORT_BATCH_SIZE = 1000
+ISSUE_EXPORT_CHUNK_SIZE = 2000
+
+# Full-text search. None picks the built-in backend for the database
+# vendor (SQLite FTS5 or PostgreSQL tsvector); set a dotted path to a
+# BaseSearchBackend subclass to use something else.
+SEARCH_BACKEND = None
+
+# Request instrumentation (see issues/instrumentation.py). QUERY_BUDGETS
+# maps URL names to the most queries a request may run, session and auth
+# lookups included; going over is logged, or raised with 'raise'.
+SERVER_TIMING = True
+# Bearer token Prometheus sends to /metrics; unset, only staff can read it
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+QUERY_BUDGETS = {
+    'dashboard': 5,
+    'issue_list': 5,
+    'project_list': 3,
+    'my_code_list': 3,
+    'code_results': 6,
+    'code_results_status': 5,
+    'search': 4,
+}
+QUERY_BUDGET_ACTION = 'log'
+
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
+}
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.conf import settings
 from django.urls import path, include
 from django.views.generic import TemplateView
 from issues import views as issues_views
@@ -6,15 +7,26 @@ from accounts import views as accounts_views
 import issues.views as views
 import issues.views as issues_views
 import accounts.views as accounts_views
-from issues import views
+from issues import api, instrumentation, views
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', TemplateView.as_view(template_name='home.html'), name='home'),
 
-    path('paste-code/', views.paste_code, name='paste_code'), 
+    path('paste-code/', views.paste_code_async if settings.ASYNC_VIEWS else views.paste_code, name='paste_code'),
+    path('paste-code/stream/', views.paste_code_stream, name='paste_code_stream'),
     path('my-code/', views.my_code_list, name='my_code_list'),
+    path(
+        'code/<int:snippet_id>/',
+        views.code_results_async if settings.ASYNC_VIEWS else views.code_results,
+        name='code_results',
+    ),
+    path('code/<int:snippet_id>/edit/', views.code_edit, name='code_edit'),
+    path('code/<int:snippet_id>/status/', views.code_results_status, name='code_results_status'),
+    path('code/<int:snippet_id>/events/', views.code_results_events, name='code_results_events'),
+    path('upload-archive/', views.upload_archive, name='upload_archive'),
+    path('archives/<int:archive_id>/', views.archive_results, name='archive_results'),
     
     
 
@@ -24,6 +36,11 @@ urlpatterns = [
     path('projects/create/', issues_views.project_create, name='project_create'),
     path('issues/', issues_views.issue_list, name='issue_list'),
     path('issues/create/', issues_views.issue_create, name='issue_create'),
+    path('issues/import/', views.issue_import, name='issue_import'),
+    path('issues/export/', views.issue_export, name='issue_export'),
+    path('search/', views.search_view, name='search'),
+    path('api/', include(api.router.urls)),
+    path('metrics', instrumentation.metrics_view, name='metrics'),
     
     # Authentication URLs
     path('accounts/', include('django.contrib.auth.urls')),
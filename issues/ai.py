@@ -0,0 +1,439 @@
+"""
+AI code analysis client.
+
+Requests go through one pooled httpx.AsyncClient per batch with:
+
+- a cap on requests in flight (AI_MAX_CONCURRENCY)
+- a process-wide token bucket (AI_RATE_LIMIT requests/second, bursts of
+  AI_RATE_BURST) shared by every thread and event loop
+- retries with exponential backoff and jitter on timeouts, 429 and 5xx,
+  honouring Retry-After
+- a response cache keyed by a hash of the provider settings and prompt,
+  stored in the AI_CACHE_ALIAS Django cache (on disk by default)
+- large snippets split into AI_CHUNK_LINES-line chunks that are
+  analyzed concurrently
+
+In structured mode the model is asked for JSON findings, which are
+validated with pydantic and come back in the same shape as the rule
+findings, ready to be merged with them and stored as CodeIssue rows.
+
+The provider is chosen by AI_PROVIDER and AI_BASE_URL; point the latter at
+`manage.py ai_stub_server` to work offline.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+import time
+import weakref
+from typing import Literal
+
+import httpx
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+from django.utils.module_loading import import_string
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+from .rules import split_lines
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class AIError(Exception):
+    pass
+
+
+class OpenAIChatProvider:
+    """Any server speaking the OpenAI chat completions API"""
+
+    endpoint = '/chat/completions'
+    system_prompt = 'You are a helpful code analysis assistant.'
+
+    def __init__(self, base_url=None, api_key=None, model=None, max_tokens=1000, temperature=0.3):
+        self.base_url = base_url or getattr(settings, 'AI_BASE_URL', 'https://api.openai.com/v1')
+        self.api_key = api_key if api_key is not None else getattr(settings, 'OPENAI_API_KEY', '')
+        self.model = model or getattr(settings, 'AI_MODEL', 'gpt-3.5-turbo')
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+
+    @property
+    def headers(self):
+        return {'Authorization': f'Bearer {self.api_key}'} if self.api_key else {}
+
+    @property
+    def cache_namespace(self):
+        """Everything besides the prompt that changes the answer"""
+        return f'{self.base_url}|{self.model}|{self.max_tokens}|{self.temperature}|{self.system_prompt}'
+
+    def payload(self, prompt, json_mode=False):
+        payload = {
+            'model': self.model,
+            'messages': [
+                {'role': 'system', 'content': self.system_prompt},
+                {'role': 'user', 'content': prompt},
+            ],
+            'max_tokens': self.max_tokens,
+            'temperature': self.temperature,
+        }
+        if json_mode:
+            payload['response_format'] = {'type': 'json_object'}
+        return payload
+
+    def parse(self, data):
+        try:
+            return data['choices'][0]['message']['content']
+        except (KeyError, IndexError, TypeError) as e:
+            raise AIError(f'Unexpected response: {json.dumps(data)[:200]}') from e
+
+
+def get_provider():
+    return import_string(getattr(settings, 'AI_PROVIDER', 'issues.ai.OpenAIChatProvider'))()
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. acquire() reserves a token under a lock and
+    sleeps outside it, so concurrent callers queue up in arrival order
+    without holding anything while they wait.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token and return how long to wait before using it"""
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = TokenBucket(
+                rate=getattr(settings, 'AI_RATE_LIMIT', 3.0),
+                capacity=getattr(settings, 'AI_RATE_BURST', 5),
+            )
+        return _rate_limiter
+
+
+def build_prompt(code, language, start_line=1):
+    numbered = '\n'.join(f'{number:>5} | {line}' for number, line in enumerate(split_lines(code), start_line))
+    return (
+        f'Analyze this {language} code for bugs, security issues, and improvements. '
+        f'Each line is prefixed with its line number.\n\n'
+        f'```{language}\n{numbered}\n```\n\n'
+        'Provide analysis in this format:\n'
+        'Line X: [Issue Type] - [Description] (Severity: [low/medium/high/critical])\n'
+        'Suggested fix: [Fix suggestion]\n'
+        '---\n'
+    )
+
+
+class AIFinding(BaseModel):
+    """One finding as the model reports it"""
+    line_number: int = Field(ge=1)
+    issue_type: str = Field(min_length=1, max_length=100)
+    description: str = Field(min_length=1)
+    severity: Literal['low', 'medium', 'high', 'critical'] = 'medium'
+    suggested_fix: str = ''
+
+    @field_validator('severity', mode='before')
+    @classmethod
+    def _lowercase_severity(cls, value):
+        return value.strip().lower() if isinstance(value, str) else value
+
+    @field_validator('issue_type', 'description', 'suggested_fix', mode='before')
+    @classmethod
+    def _strip(cls, value):
+        return value.strip() if isinstance(value, str) else value
+
+
+_CODE_FENCE = re.compile(r'^```(?:json)?\s*|\s*```$')
+
+
+def build_structured_prompt(code, language, start_line=1):
+    numbered = '\n'.join(f'{number:>5} | {line}' for number, line in enumerate(split_lines(code), start_line))
+    return (
+        f'Analyze this {language} code for bugs, security issues, and improvements. '
+        f'Each line is prefixed with its line number.\n\n'
+        f'```{language}\n{numbered}\n```\n\n'
+        'Reply with only a JSON object of the form {"findings": [{"line_number": <int>, '
+        '"issue_type": <short name>, "description": <one sentence>, '
+        '"severity": "low"|"medium"|"high"|"critical", "suggested_fix": <the corrected line>}]}. '
+        'Use an empty list when there is nothing to report.'
+    )
+
+
+def parse_findings(text, lines, start_line=1):
+    """
+    Validate the model's JSON answer for a chunk of `lines` starting at
+    start_line. Findings that fail validation or point outside the chunk
+    are dropped one by one; an answer that isn't JSON at all raises AIError.
+    """
+    try:
+        data = json.loads(_CODE_FENCE.sub('', text.strip()))
+    except ValueError as e:
+        raise AIError(f'Response is not JSON: {text[:200]}') from e
+    items = data.get('findings') if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        raise AIError(f'Response has no findings list: {text[:200]}')
+
+    findings = []
+    for item in items:
+        try:
+            finding = AIFinding.model_validate(item)
+        except ValidationError as e:
+            logger.info('Dropping invalid AI finding %r: %s', item, e)
+            continue
+        index = finding.line_number - start_line
+        if not 0 <= index < len(lines):
+            continue
+        findings.append({**finding.model_dump(), 'original_line': lines[index].strip()})
+    return findings
+
+
+def merge_findings(primary, extra):
+    """
+    Combine two finding lists, keeping one finding per (line_number,
+    issue_type); `primary` wins ties. Sorted by line.
+    """
+    seen = {(issue['line_number'], issue['issue_type']) for issue in primary}
+    merged = list(primary)
+    for issue in extra:
+        key = (issue['line_number'], issue['issue_type'])
+        if key not in seen:
+            seen.add(key)
+            merged.append(issue)
+    merged.sort(key=lambda issue: issue['line_number'])
+    return merged
+
+
+def chunk_code(code, max_lines=None):
+    """Split code into (start line, chunk) pieces of at most max_lines lines"""
+    max_lines = max_lines or getattr(settings, 'AI_CHUNK_LINES', 200)
+    lines = split_lines(code)
+    return [
+        (start + 1, '\n'.join(lines[start:start + max_lines]))
+        for start in range(0, len(lines), max_lines)
+    ]
+
+
+class AIClient:
+    """
+    Async client for one batch of work:
+
+        async with AIClient() as client:
+            results = await client.analyze_many([(code, 'python'), ...])
+    """
+
+    def __init__(self, provider=None, max_concurrency=None, rate_limiter=None, max_retries=None,
+                 backoff=None, timeout=None, transport=None, cache_alias=None):
+        self.provider = provider or get_provider()
+        self.max_concurrency = max_concurrency or getattr(settings, 'AI_MAX_CONCURRENCY', 4)
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.max_retries = getattr(settings, 'AI_MAX_RETRIES', 4) if max_retries is None else max_retries
+        self.backoff = getattr(settings, 'AI_RETRY_BACKOFF', 0.5) if backoff is None else backoff
+        self.timeout = timeout or getattr(settings, 'AI_TIMEOUT', 30)
+        self.transport = transport
+        self.cache_alias = cache_alias or getattr(settings, 'AI_CACHE_ALIAS', 'default')
+        self.cache_timeout = getattr(settings, 'AI_CACHE_TIMEOUT', 60 * 60 * 24 * 7)
+        self.requests_sent = 0
+        self._http = None
+        self._semaphore = None
+
+    def open(self):
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._http = httpx.AsyncClient(
+            base_url=self.provider.base_url,
+            headers=self.provider.headers,
+            timeout=httpx.Timeout(self.timeout),
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency,
+            ),
+            transport=self.transport,
+        )
+        return self
+
+    async def __aenter__(self):
+        return self.open()
+
+    async def __aexit__(self, *exc_info):
+        await self._http.aclose()
+
+    @property
+    def cache(self):
+        try:
+            return caches[self.cache_alias]
+        except InvalidCacheBackendError:
+            return caches['default']
+
+    def cache_key(self, prompt):
+        digest = hashlib.sha256(f'{self.provider.cache_namespace}\0{prompt}'.encode()).hexdigest()
+        return f'ai:{digest}'
+
+    async def complete(self, prompt, json_mode=False):
+        """The provider's answer for a prompt, from the cache when possible"""
+        key = self.cache_key(prompt)
+        cached = await self.cache.aget(key)
+        if cached is not None:
+            return cached
+        async with self._semaphore:
+            text = await self._request(prompt, json_mode)
+        await self.cache.aset(key, text, self.cache_timeout)
+        return text
+
+    async def _request(self, prompt, json_mode=False):
+        payload = self.provider.payload(prompt, json_mode)
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire()
+            retry_after = None
+            try:
+                self.requests_sent += 1
+                response = await self._http.post(self.provider.endpoint, json=payload)
+            except httpx.TransportError as e:
+                error = f'{type(e).__name__}: {e}'
+            else:
+                if response.status_code < 400:
+                    return self.provider.parse(response.json())
+                if response.status_code not in RETRY_STATUSES:
+                    raise AIError(f'HTTP {response.status_code}: {response.text[:200]}')
+                error = f'HTTP {response.status_code}'
+                retry_after = response.headers.get('Retry-After')
+
+            if attempt == self.max_retries:
+                raise AIError(f'Giving up after {attempt + 1} attempts: {error}')
+            delay = self.backoff * 2 ** attempt * (1 + random.random())
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, int(retry_after))
+            logger.warning('AI request failed (%s), retrying in %.1fs', error, delay)
+            await asyncio.sleep(delay)
+
+    async def analyze(self, code, language='python'):
+        """Analyze a snippet; large ones are split into chunks analyzed concurrently"""
+        chunks = chunk_code(code)
+        answers = await asyncio.gather(*(
+            self.complete(build_prompt(chunk, language, start)) for start, chunk in chunks
+        ))
+        if len(answers) == 1:
+            return answers[0]
+        return '\n'.join(
+            f'Lines {start}-{start + chunk.count(chr(10))}:\n{answer}'
+            for (start, chunk), answer in zip(chunks, answers)
+        )
+
+    async def analyze_structured(self, code, language='python'):
+        """Validated findings for a snippet, in the same shape as the rule findings"""
+        chunks = chunk_code(code)
+        answers = await asyncio.gather(*(
+            self.complete(build_structured_prompt(chunk, language, start), json_mode=True)
+            for start, chunk in chunks
+        ))
+        findings = []
+        for (start, chunk), answer in zip(chunks, answers):
+            try:
+                findings.extend(parse_findings(answer, split_lines(chunk), start))
+            except AIError:
+                # Don't keep serving a malformed answer from the cache
+                await self.cache.adelete(self.cache_key(build_structured_prompt(chunk, language, start)))
+                raise
+        return merge_findings([], findings)
+
+    async def analyze_many(self, items):
+        """Analyze (code, language) pairs concurrently; failures come back as {'error': ...}"""
+        return await asyncio.gather(*(self._analyze_result(code, language) for code, language in items))
+
+    async def _analyze_result(self, code, language):
+        try:
+            return {'analysis': await self.analyze(code, language)}
+        except (AIError, httpx.HTTPError) as e:
+            return {'error': f'AI analysis failed: {e}'}
+
+
+async def analyze_with_ai_async(code, language='python', **client_options):
+    async with AIClient(**client_options) as client:
+        return (await client.analyze_many([(code, language)]))[0]
+
+
+def _missing_key_error(provider):
+    if getattr(provider, 'api_key', None) == '' and 'openai.com' in provider.base_url:
+        return {'error': 'OpenAI API key not configured'}
+    return None
+
+
+def analyze_with_ai(code, language='python'):
+    """
+    Analyze code with the configured AI provider from synchronous code.
+    Returns {'analysis': text} or {'error': message}.
+    """
+    provider = get_provider()
+    return _missing_key_error(provider) or async_to_sync(analyze_with_ai_async)(code, language, provider=provider)
+
+
+async def _structured_result(client, code, language):
+    try:
+        return {'findings': await client.analyze_structured(code, language)}
+    except (AIError, httpx.HTTPError) as e:
+        return {'error': f'AI analysis failed: {e}'}
+
+
+async def analyze_with_ai_structured_async(code, language='python', **client_options):
+    async with AIClient(**client_options) as client:
+        return await _structured_result(client, code, language)
+
+
+_loop_clients = weakref.WeakKeyDictionary()
+
+
+def get_shared_client():
+    """
+    One pooled client per event loop, for ASGI servers where every request
+    awaits on the same long-lived loop. It stays open as long as the loop.
+    """
+    loop = asyncio.get_running_loop()
+    client = _loop_clients.get(loop)
+    if client is None:
+        client = _loop_clients[loop] = AIClient().open()
+    return client
+
+
+async def analyze_with_ai_structured_shared(code, language='python'):
+    """analyze_with_ai_structured() for async views, on the event loop's shared client"""
+    client = get_shared_client()
+    return _missing_key_error(client.provider) or await _structured_result(client, code, language)
+
+
+def analyze_with_ai_structured(code, language='python'):
+    """
+    Structured AI analysis from synchronous code.
+    Returns {'findings': [finding dicts]} or {'error': message}.
+    """
+    provider = get_provider()
+    return _missing_key_error(provider) or async_to_sync(analyze_with_ai_structured_async)(
+        code, language, provider=provider,
+    )
@@ -0,0 +1,95 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+
+from .analyzers import ruleset_version
+
+_TRAILING_WHITESPACE = re.compile(r'[ \t]+$', re.MULTILINE)
+
+
+def normalize_code(code):
+    """
+    Normalize code for hashing without changing any line number:
+    unify line endings and drop trailing whitespace.
+    """
+    code = code.replace('\r\n', '\n')
+    code = _TRAILING_WHITESPACE.sub('', code)
+    return code.rstrip('\n')
+
+
+def cache_key(code, language):
+    """
+    Keyed on the language's ruleset version: editing one backend's rules
+    orphans that language's cached results and nothing else.
+    """
+    digest = hashlib.sha256(f'{language}\0{normalize_code(code)}'.encode('utf-8', 'surrogatepass'))
+    return f'analysis:{ruleset_version(language)}:{digest.hexdigest()}'
+
+
+class AnalysisCache:
+    """
+    Two-level cache for analysis results: a size-bounded LRU inside the
+    process, in front of a Django cache shared by all workers.
+    """
+
+    def __init__(self, max_entries=512, alias='default', timeout=None):
+        self.max_entries = max_entries
+        self.alias = alias
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        try:
+            return caches[self.alias]
+        except InvalidCacheBackendError:
+            return caches['default']
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        value = self.shared.get(key)
+        if value is not None:
+            self._remember(key, value)
+        return value
+
+    def set(self, key, value):
+        value = tuple(value)
+        self._remember(key, value)
+        self.shared.set(key, value, self.timeout)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+analysis_cache = AnalysisCache(
+    max_entries=getattr(settings, 'ANALYSIS_CACHE_MAX_ENTRIES', 512),
+    alias=getattr(settings, 'ANALYSIS_CACHE_ALIAS', 'default'),
+    timeout=getattr(settings, 'ANALYSIS_CACHE_TIMEOUT', 60 * 60 * 24),
+)
+
+
+def cached_analysis(code, language, analyze):
+    """Return analyze(code, language), reusing a previous result for the same code"""
+    key = cache_key(code, language)
+    issues = analysis_cache.get(key)
+    if issues is None:
+        issues = analyze(code, language)
+        analysis_cache.set(key, issues)
+    # Hand out copies so callers can't mutate what is cached
+    return [dict(issue) for issue in issues]
@@ -0,0 +1,76 @@
+"""
+Per-language analyzer registry.
+
+Backends are named by dotted path in the ANALYZERS setting or advertised
+by installed packages under the `bugtracker.analyzers` entry point
+group (the setting wins when both name a language). Nothing is imported
+until a language is first analyzed, so a worker only pays for the
+languages it actually sees.
+"""
+import threading
+from importlib.metadata import entry_points
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+ENTRY_POINT_GROUP = 'bugtracker.analyzers'
+
+
+class AnalyzerRegistry:
+    def __init__(self):
+        self._sources = None
+        self._analyzers = {}
+        self._lock = threading.Lock()
+
+    def sources(self):
+        """language -> dotted path or entry point, without importing anything"""
+        if self._sources is None:
+            sources = {ep.name: ep for ep in entry_points(group=ENTRY_POINT_GROUP)}
+            sources.update(getattr(settings, 'ANALYZERS', {}))
+            self._sources = sources
+        return self._sources
+
+    def languages(self):
+        return sorted(self.sources())
+
+    def is_loaded(self, language):
+        return language in self._analyzers
+
+    def get(self, language):
+        """The analyzer for a language, importing its backend on first use; None if unknown"""
+        analyzer = self._analyzers.get(language)
+        if analyzer is not None:
+            return analyzer
+        source = self.sources().get(language)
+        if source is None:
+            return None
+        with self._lock:
+            if language not in self._analyzers:
+                factory = import_string(source) if isinstance(source, str) else source.load()
+                self._analyzers[language] = factory()
+            return self._analyzers[language]
+
+    def reset(self):
+        with self._lock:
+            self._sources = None
+            self._analyzers = {}
+
+
+registry = AnalyzerRegistry()
+
+
+def get_analyzer(language):
+    return registry.get(language)
+
+
+def ruleset_version(language):
+    analyzer = registry.get(language)
+    return analyzer.version if analyzer is not None else 'none'
+
+
+@receiver(setting_changed)
+def _reset_registry(setting, **kwargs):
+    if setting == 'ANALYZERS':
+        registry.reset()
@@ -0,0 +1,60 @@
+import hashlib
+import sys
+from functools import cached_property
+from pathlib import Path
+
+from .. import rules as rule_engine
+
+
+def source_hash(*modules):
+    digest = hashlib.sha256()
+    for module in modules:
+        digest.update(Path(module.__file__).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+class LanguageAnalyzer:
+    """
+    One language backend.
+
+    Subclasses set `rules`, a RuleSet of line rules compiled when the
+    backend module is imported, and may override analyze() with
+    something that looks at more than one line at a time.
+    """
+    language = ''
+    rules = None
+    # Modules besides the backend's own whose code shapes the findings
+    source_modules = ()
+
+    def analyze(self, code):
+        return self.rules.scan(code)
+
+    def analyze_chunks(self, code, chunk_lines):
+        """
+        analyze() for callers that may run out of time: yields (last line
+        covered, findings up to it) about every chunk_lines lines. The
+        findings add up to analyze()'s; backends overriding one override
+        both.
+        """
+        return self.rules.scan_chunks(rule_engine.split_lines(code), chunk_lines)
+
+    @property
+    def line_local(self):
+        """
+        Whether a line's findings depend on that line alone: analyze() is
+        the line scan and no block comment can span lines.
+        """
+        return type(self).analyze is LanguageAnalyzer.analyze and self.rules.block_comment is None
+
+    def scan_lines(self, lines, start=1):
+        return self.rules.scan_lines(lines, start)
+
+    @cached_property
+    def version(self):
+        """
+        Hash of every module that decides what a finding looks like, so
+        editing a rule orphans that language's cached results and nothing
+        else.
+        """
+        own = sys.modules[type(self).__module__]
+        return source_hash(rule_engine, sys.modules[__name__], own, *self.source_modules)
@@ -0,0 +1,184 @@
+import re
+
+from ..rules import Rule, RuleSet, split_lines
+from .base import LanguageAnalyzer
+
+# sizeof(dest) only bounds a copy when dest is an array; for a pointer
+# it's the pointer's size. The fixes leave this placeholder, and
+# CppAnalyzer puts sizeof() in its place where dest was declared as an
+# array on or before the finding's line.
+_SIZE_PLACEHOLDER = re.compile(r'<size of (.+?)>(?=[\s,)])')
+_MEMBER_PATH = re.compile(r'(?:\w+\s*(?:\.|->)\s*)*(\w+)')
+# `T name[N];`, `T name[] = ...` and `T name[N]{}`, but not parameters
+_ARRAY_DECLARATION = re.compile(r'\b(\w+)\s+(\w+)\s*\[[^\]\n]*\]\s*(?:\[[^\]\n]*\]\s*)*[=;{]')
+_NOT_TYPES = {'return', 'case', 'throw', 'delete', 'else', 'do', 'sizeof', 'new', 'co_return', 'co_yield'}
+
+
+def _fix_gets(line):
+    return re.sub(r'\bgets\s*\(\s*(\w+)\s*\)', r'fgets(\1, <size of \1>, stdin)', line)
+
+
+_STRING_COPY = re.compile(r'\bstr(cpy|cat)\s*\(\s*([^,()]+?)\s*,\s*((?:[^()]|\([^()]*\))+?)\s*\)')
+_MALLOC = re.compile(
+    r'^(?:(?P<type>[\w:]+)\s*\*\s*|auto\s+)?(?P<name>\w+)\s*=\s*(?:\([^()]*\)\s*)?malloc\s*\(\s*(?P<size>.+?)\s*\)\s*;$'
+)
+_ARRAY_SIZE = re.compile(
+    r'^(?:(?P<count>.+?)\s*\*\s*sizeof\s*\(\s*(?P<type>[^()]+?)\s*\)'
+    r'|sizeof\s*\(\s*(?P<type2>[^()]+?)\s*\)\s*\*\s*(?P<count2>.+?))$'
+)
+_ONE_OBJECT = re.compile(r'^sizeof\s*\(\s*(?P<type>[^()]+?)\s*\)$')
+_BYTE_TYPES = ('char', 'uint8_t', 'std::byte')
+
+
+def _copy_bound(match):
+    kind, dest, src = match.groups()
+    if kind == 'cpy':
+        return f'strncpy({dest}, {src}, <size of {dest}> - 1)'
+    return f'strncat({dest}, {src}, <size of {dest}> - strlen({dest}) - 1)'
+
+
+def _fix_strcpy(line):
+    return _STRING_COPY.sub(_copy_bound, line)
+
+
+def _fix_sprintf(line):
+    return re.sub(r'\bsprintf\s*\(\s*(\w+)\s*,', r'snprintf(\1, <size of \1>,', line)
+
+
+def _fix_malloc(line):
+    """`T *p = malloc(...);` as a std::vector, or a std::unique_ptr for a single object"""
+    match = _MALLOC.match(line)
+    if match is None:
+        return line
+    name, size, declared = match.group('name'), match.group('size'), match.group('type')
+    one = _ONE_OBJECT.match(size)
+    if one:
+        return f'auto {name} = std::make_unique<{one.group("type")}>();'
+    array = _ARRAY_SIZE.match(size)
+    if array:
+        element = array.group('type') or array.group('type2')
+        return f'std::vector<{element}> {name}({array.group("count") or array.group("count2")});'
+    if declared is None or declared in _BYTE_TYPES:
+        return f'std::vector<{declared or "char"}> {name}({size});'
+    return f'std::vector<{declared}> {name}(({size}) / sizeof({declared}));'
+
+
+def _fix_null(line):
+    return re.sub(r'\bNULL\b', 'nullptr', line)
+
+
+def _fix_using_namespace(line):
+    return ''
+
+
+UNSAFE_GETS = Rule(
+    pattern=r'\bgets\s*\(',
+    issue_type='Buffer Overflow',
+    description='gets() cannot limit input length; use fgets() or std::getline()',
+    severity='critical',
+    fix=_fix_gets,
+    keyword='gets',
+)
+
+UNBOUNDED_STRING_COPY = Rule(
+    pattern=r'\bstr(cpy|cat)\s*\(',
+    issue_type='Buffer Overflow',
+    description='strcpy()/strcat() do not check the destination size',
+    severity='high',
+    fix=_fix_strcpy,
+    keyword='str',
+)
+
+UNBOUNDED_SPRINTF = Rule(
+    pattern=r'\bsprintf\s*\(',
+    issue_type='Buffer Overflow',
+    description='sprintf() does not check the destination size; use snprintf()',
+    severity='high',
+    fix=_fix_sprintf,
+    keyword='sprintf',
+)
+
+MANUAL_ALLOCATION = Rule(
+    pattern=r'\bmalloc\s*\(',
+    issue_type='Manual Memory Management',
+    description='malloc() in C++; prefer containers or smart pointers',
+    severity='medium',
+    fix=_fix_malloc,
+    keyword='malloc',
+)
+
+NULL_MACRO = Rule(
+    pattern=r'\bNULL\b',
+    issue_type='NULL Macro',
+    description='Use nullptr instead of NULL (C++11)',
+    severity='low',
+    fix=_fix_null,
+    keyword='NULL',
+)
+
+USING_NAMESPACE_STD = Rule(
+    pattern=r'^using\s+namespace\s+std\s*;',
+    issue_type='using namespace std',
+    description='Pulls all of std into the global namespace; qualify names instead',
+    severity='low',
+    fix=_fix_using_namespace,
+    keyword='using',
+)
+
+CPP_RULES = RuleSet(
+    [UNSAFE_GETS, UNBOUNDED_STRING_COPY, UNBOUNDED_SPRINTF, MANUAL_ALLOCATION, NULL_MACRO, USING_NAMESPACE_STD],
+    comment_prefixes=('//',),
+    block_comment=('/*', '*/'),
+    quotes=('"', "'"),
+)
+
+
+def _declaring(lines, start, arrays):
+    """Pass lines through, noting in arrays the line each array name is first declared on"""
+    for line_number, line in enumerate(lines, start):
+        if '[' in line:
+            for declared_type, name in _ARRAY_DECLARATION.findall(line):
+                if declared_type not in _NOT_TYPES:
+                    arrays.setdefault(name, line_number)
+        yield line
+
+
+def _with_sizes(findings, arrays):
+    """findings with sizeof(dest) for the size placeholders of declared arrays"""
+    for finding in findings:
+        if '<size of ' not in finding['suggested_fix']:
+            continue
+
+        def size(match):
+            path = _MEMBER_PATH.fullmatch(match.group(1))
+            declared = arrays.get(path.group(1)) if path else None
+            if declared is None or declared > finding['line_number']:
+                return match.group()
+            return f'sizeof({match.group(1)})'
+
+        finding['suggested_fix'] = _SIZE_PLACEHOLDER.sub(size, finding['suggested_fix'])
+    return findings
+
+
+class CppAnalyzer(LanguageAnalyzer):
+    language = 'cpp'
+    rules = CPP_RULES
+
+    def analyze(self, code):
+        findings = self.rules.scan(code)
+        if not any('<size of ' in finding['suggested_fix'] for finding in findings):
+            return findings
+        arrays = {}
+        for _ in _declaring(split_lines(code), 1, arrays):
+            pass
+        return _with_sizes(findings, arrays)
+
+    def analyze_chunks(self, code, chunk_lines):
+        arrays = {}
+        for analyzed, findings in self.rules.scan_chunks(_declaring(split_lines(code), 1, arrays), chunk_lines):
+            yield analyzed, _with_sizes(findings, arrays)
+
+    def scan_lines(self, lines, start=1):
+        arrays = {}
+        for finding in self.rules.scan_lines(_declaring(lines, start, arrays), start):
+            yield from _with_sizes([finding], arrays)
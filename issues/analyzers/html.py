@@ -0,0 +1,81 @@
+import re
+
+from ..rules import Rule, RuleSet
+from .base import LanguageAnalyzer
+
+
+def _fix_javascript_url(line):
+    return re.sub(r'href\s*=\s*(["\']?)javascript:[^"\'\s>]*', r'href=\1#', line)
+
+
+def _fix_img_alt(line):
+    return re.sub(r'<img\b', '<img alt=""', line, count=1)
+
+
+def _fix_deprecated_tag(line):
+    return re.sub(r'<(/?)(font|center|marquee|blink)\b', r'<\1span', line)
+
+
+def _fix_inline_style(line):
+    return re.sub(r'\sstyle\s*=\s*("[^"]*"|\'[^\']*\')', '', line)
+
+
+def _fix_important(line):
+    return re.sub(r'\s*!important', '', line)
+
+
+JAVASCRIPT_URL = Rule(
+    pattern=r'href\s*=\s*["\']?javascript:',
+    issue_type='javascript: URL',
+    description='javascript: URLs bypass Content Security Policy; attach an event listener instead',
+    severity='high',
+    fix=_fix_javascript_url,
+    keyword='javascript:',
+)
+
+IMG_WITHOUT_ALT = Rule(
+    pattern=r'<img\b(?![^>]*\balt\s*=)',
+    issue_type='Missing alt Text',
+    description='Images need alt text for screen readers',
+    severity='medium',
+    fix=_fix_img_alt,
+    keyword='<img',
+)
+
+DEPRECATED_TAG = Rule(
+    pattern=r'<(font|center|marquee|blink)\b',
+    issue_type='Deprecated Tag',
+    description='Presentational tag removed from HTML5; use CSS',
+    severity='low',
+    fix=_fix_deprecated_tag,
+    keyword='<',
+)
+
+INLINE_STYLE = Rule(
+    pattern=r'\sstyle\s*=\s*["\']',
+    issue_type='Inline Style',
+    description='Inline styles are hard to override; move them to a stylesheet',
+    severity='low',
+    fix=_fix_inline_style,
+    keyword='style',
+)
+
+IMPORTANT_DECLARATION = Rule(
+    pattern=r'!important',
+    issue_type='!important',
+    description='!important breaks the cascade; use a more specific selector',
+    severity='low',
+    fix=_fix_important,
+    keyword='!important',
+)
+
+HTML_RULES = RuleSet(
+    [JAVASCRIPT_URL, IMG_WITHOUT_ALT, DEPRECATED_TAG, INLINE_STYLE, IMPORTANT_DECLARATION],
+    comment_prefixes=('<!--', '/*'),
+)
+
+
+class HTMLAnalyzer(LanguageAnalyzer):
+    """HTML and CSS"""
+    language = 'html'
+    rules = HTML_RULES
@@ -0,0 +1,74 @@
+import re
+
+from ..rules import Rule, RuleSet
+from .base import LanguageAnalyzer
+
+_STRING_COMPARISON = re.compile(r'([\w.]+)\s*==\s*("[^"]*")|("[^"]*")\s*==\s*([\w.]+)')
+
+
+def _fix_string_comparison(line):
+    return _STRING_COMPARISON.sub(
+        lambda m: f'{m.group(2)}.equals({m.group(1)})' if m.group(1) else f'{m.group(3)}.equals({m.group(4)})',
+        line,
+    )
+
+
+def _fix_generic_catch(line):
+    return re.sub(r'\b(Exception|Throwable)\b', 'SpecificException', line, count=1)
+
+
+def _fix_print_stack_trace(line):
+    return re.sub(r'([\w.]+)\.printStackTrace\(\s*\)', r'logger.error("Unexpected error", \1)', line)
+
+
+def _fix_system_out(line):
+    return re.sub(r'System\.(out|err)\.print(ln|f)?\(', 'logger.info(', line)
+
+
+STRING_COMPARISON = Rule(
+    pattern=r'"\s*==|==\s*"',
+    issue_type='String Reference Comparison',
+    description='== compares String references, not contents; use equals()',
+    severity='high',
+    fix=_fix_string_comparison,
+    keyword='==',
+)
+
+GENERIC_CATCH = Rule(
+    pattern=r'catch\s*\(\s*(final\s+)?(Exception|Throwable)\s+\w+\s*\)',
+    issue_type='Generic Catch',
+    description='Catching Exception or Throwable hides bugs; catch the exceptions you expect',
+    severity='medium',
+    fix=_fix_generic_catch,
+    keyword='catch',
+)
+
+PRINT_STACK_TRACE = Rule(
+    pattern=r'\.printStackTrace\(\s*\)',
+    issue_type='printStackTrace',
+    description='printStackTrace() writes to stderr; log the exception instead',
+    severity='low',
+    fix=_fix_print_stack_trace,
+    keyword='printStackTrace',
+)
+
+SYSTEM_OUT = Rule(
+    pattern=r'System\.(out|err)\.print',
+    issue_type='System.out Logging',
+    description='Use a logger instead of System.out/System.err',
+    severity='low',
+    fix=_fix_system_out,
+    keyword='System.',
+)
+
+JAVA_RULES = RuleSet(
+    [STRING_COMPARISON, GENERIC_CATCH, PRINT_STACK_TRACE, SYSTEM_OUT],
+    comment_prefixes=('//',),
+    block_comment=('/*', '*/'),
+    quotes=('"', "'"),
+)
+
+
+class JavaAnalyzer(LanguageAnalyzer):
+    language = 'java'
+    rules = JAVA_RULES
@@ -0,0 +1,99 @@
+import re
+
+from ..rules import Rule, RuleSet
+from .base import LanguageAnalyzer
+
+_LOOSE_EQUALITY = re.compile(r'(?<![=!<>])==(?!=)')
+_LOOSE_INEQUALITY = re.compile(r'!=(?!=)')
+_VAR = re.compile(r'\bvar\s+')
+
+
+def _fix_eval(line):
+    return re.sub(r'\beval\s*\(', 'JSON.parse(', line)
+
+
+def _fix_debugger(line):
+    return ''
+
+
+def _fix_loose_equality(line):
+    return _LOOSE_EQUALITY.sub('===', line)
+
+
+def _fix_loose_inequality(line):
+    return _LOOSE_INEQUALITY.sub('!==', line)
+
+
+def _fix_var(line):
+    return _VAR.sub('let ', line)
+
+
+def _fix_console(line):
+    return f'// {line}'
+
+
+EVAL_CALL = Rule(
+    pattern=r'\beval\s*\(',
+    issue_type='Use of eval',
+    description='eval() runs arbitrary code; parse data with JSON.parse instead',
+    severity='high',
+    fix=_fix_eval,
+    keyword='eval',
+)
+
+DEBUGGER_STATEMENT = Rule(
+    pattern=r'^debugger\s*;?$',
+    issue_type='Debugger Statement',
+    description='debugger statement left in code',
+    severity='medium',
+    fix=_fix_debugger,
+    keyword='debugger',
+)
+
+LOOSE_EQUALITY = Rule(
+    pattern=_LOOSE_EQUALITY.pattern,
+    issue_type='Loose Equality',
+    description='== coerces types; use === for comparisons',
+    severity='medium',
+    fix=_fix_loose_equality,
+    keyword='==',
+)
+
+LOOSE_INEQUALITY = Rule(
+    pattern=_LOOSE_INEQUALITY.pattern,
+    issue_type='Loose Equality',
+    description='!= coerces types; use !== for comparisons',
+    severity='medium',
+    fix=_fix_loose_inequality,
+    keyword='!=',
+)
+
+VAR_DECLARATION = Rule(
+    pattern=r'^(export\s+)?var\s+\w',
+    issue_type='var Declaration',
+    description='var is function-scoped; use let or const',
+    severity='low',
+    fix=_fix_var,
+    keyword='var',
+)
+
+CONSOLE_CALL = Rule(
+    pattern=r'\bconsole\.(log|debug|trace)\s*\(',
+    issue_type='Console Call',
+    description='console logging left in code',
+    severity='low',
+    fix=_fix_console,
+    keyword='console.',
+)
+
+JAVASCRIPT_RULES = RuleSet(
+    [EVAL_CALL, DEBUGGER_STATEMENT, LOOSE_EQUALITY, LOOSE_INEQUALITY, VAR_DECLARATION, CONSOLE_CALL],
+    comment_prefixes=('//',),
+    block_comment=('/*', '*/'),
+    quotes=('"', "'", '`'),
+)
+
+
+class JavaScriptAnalyzer(LanguageAnalyzer):
+    language = 'javascript'
+    rules = JAVASCRIPT_RULES
@@ -0,0 +1,16 @@
+from .. import ast_analysis
+from ..rules import PYTHON_RULES
+from .base import LanguageAnalyzer
+
+
+class PythonAnalyzer(LanguageAnalyzer):
+    """Syntax-tree analysis, with the line rules as fallback and for streaming"""
+    language = 'python'
+    rules = PYTHON_RULES
+    source_modules = (ast_analysis,)
+
+    def analyze(self, code):
+        return ast_analysis.analyze_python_code(code)
+
+    def analyze_chunks(self, code, chunk_lines):
+        return ast_analysis.analyze_python_code_chunks(code, chunk_lines)
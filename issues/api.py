@@ -0,0 +1,175 @@
+"""
+Read-only JSON API.
+
+Every endpoint is scoped to the requesting user's own rows, accepts a
+?fields= sparse fieldset and pages with opaque cursors. Issue endpoints
+also answer conditional GETs: the validators come from a single
+aggregate over updated_at (the issues' and that of the related rows they
+copy fields from), so an unchanged resource returns 304 without loading
+or serializing a single row.
+"""
+import hashlib
+
+from django.db.models import Count, Max, Prefetch
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import pagination, permissions, routers, viewsets
+
+from .filters import filter_issues, issue_filters
+from .models import CodeIssue, CodeSnippet, Comment, Issue, Project
+from .serializers import (
+    CodeIssueSerializer,
+    CodeSnippetSerializer,
+    CommentSerializer,
+    IssueSerializer,
+    ProjectSerializer,
+    requested_fields,
+)
+
+
+class NewestFirstCursorPagination(pagination.CursorPagination):
+    ordering = ('-created_at', '-id')
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class ReadOnlyAPIViewSet(viewsets.ReadOnlyModelViewSet):
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NewestFirstCursorPagination
+    lookup_value_regex = r'\d+'
+
+    def wants(self, field):
+        fields = requested_fields(self.request)
+        return fields is None or field in fields
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for viewsets over a model with an
+    updated_at column.
+
+    Fields the serializer copies from related rows have to move the
+    validators too, or renaming a project would be answered with a stale
+    304. `related_versions` maps such a field to the relation, whose own
+    updated_at then counts; `related_usernames` does the same for users,
+    which have no updated_at, so their username itself goes into the ETag.
+    """
+    related_versions = {}
+    related_usernames = {}
+
+    def related_lookups(self):
+        versions = [f'{name}__updated_at' for field, name in self.related_versions.items() if self.wants(field)]
+        usernames = [f'{name}__username' for field, name in self.related_usernames.items() if self.wants(field)]
+        return versions, usernames
+
+    def etag_for(self, *parts):
+        # The same rows render differently per user, fieldset, cursor and format
+        key = '|'.join(str(part) for part in (
+            self.request.user.pk, self.request.get_full_path(), self.request.accepted_renderer.format, *parts,
+        ))
+        return quote_etag(hashlib.sha256(key.encode()).hexdigest())
+
+    def conditional(self, request, etag, last_modified, handler, *args, **kwargs):
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        # Deletes don't move max(updated_at), so the row count is part of
+        # the ETag and the list sends no Last-Modified of its own. The
+        # usernames are grouped on, which is still one query: one row per
+        # distinct user rather than per issue.
+        versions, usernames = self.related_lookups()
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        aggregates = {'count': Count('id'), 'last_modified': Max('updated_at')}
+        aggregates.update((f'version_{i}', Max(lookup)) for i, lookup in enumerate(versions))
+        if usernames:
+            state = sorted(
+                queryset.values(*usernames).annotate(**aggregates).values_list(*usernames, *aggregates), key=str,
+            )
+        else:
+            state = list(queryset.aggregate(**aggregates).values())
+        return self.conditional(request, self.etag_for(*state), None, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        versions, usernames = self.related_lookups()
+        queryset = self.filter_queryset(self.get_queryset())
+        state = queryset.filter(pk=kwargs['pk']).values_list('updated_at', *versions, *usernames).first()
+        if state is None:
+            return super().retrieve(request, *args, **kwargs)
+        last_modified = max(moment for moment in state[:1 + len(versions)] if moment)
+        etag = self.etag_for(*state)
+        return self.conditional(request, etag, last_modified, super().retrieve, *args, **kwargs)
+
+
+class ProjectViewSet(ReadOnlyAPIViewSet):
+    serializer_class = ProjectSerializer
+
+    def get_queryset(self):
+        return Project.objects.filter(created_by=self.request.user)
+
+
+class IssueViewSet(ConditionalGetMixin, ReadOnlyAPIViewSet):
+    """Filterable with the same ?status=&priority=&project=&assigned_to= as the issue list page"""
+    serializer_class = IssueSerializer
+    related_versions = {'project_name': 'project'}
+    related_usernames = {'created_by': 'created_by', 'assigned_to': 'assigned_to'}
+
+    def get_queryset(self):
+        issues = filter_issues(Issue.objects.filter(created_by=self.request.user), issue_filters(self.request))
+        related = [
+            name for name, field in [
+                ('project', 'project_name'), ('created_by', 'created_by'), ('assigned_to', 'assigned_to'),
+            ] if self.wants(field)
+        ]
+        return issues.select_related(*related) if related else issues
+
+
+class CommentViewSet(ReadOnlyAPIViewSet):
+    serializer_class = CommentSerializer
+
+    def get_queryset(self):
+        comments = Comment.objects.filter(issue__created_by=self.request.user)
+        issue = self.request.query_params.get('issue', '')
+        if issue.isdigit():
+            comments = comments.filter(issue_id=issue)
+        return comments.select_related('user') if self.wants('user') else comments
+
+
+class CodeSnippetViewSet(ReadOnlyAPIViewSet):
+    serializer_class = CodeSnippetSerializer
+
+    def get_queryset(self):
+        snippets = CodeSnippet.objects.filter(created_by=self.request.user)
+        if not self.wants('code'):
+            snippets = snippets.defer('code')
+        if self.wants('issues'):
+            snippets = snippets.prefetch_related(
+                Prefetch('codeissue_set', queryset=CodeIssue.objects.order_by('line_number', 'id'))
+            )
+        return snippets
+
+
+class CodeIssueViewSet(ReadOnlyAPIViewSet):
+    serializer_class = CodeIssueSerializer
+
+    def get_queryset(self):
+        findings = CodeIssue.objects.filter(snippet__created_by=self.request.user)
+        snippet = self.request.query_params.get('snippet', '')
+        if snippet.isdigit():
+            findings = findings.filter(snippet_id=snippet)
+        return findings
+
+
+router = routers.DefaultRouter()
+router.register('projects', ProjectViewSet, basename='api-project')
+router.register('issues', IssueViewSet, basename='api-issue')
+router.register('comments', CommentViewSet, basename='api-comment')
+router.register('snippets', CodeSnippetViewSet, basename='api-snippet')
+router.register('code-issues', CodeIssueViewSet, basename='api-codeissue')
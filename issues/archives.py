@@ -0,0 +1,241 @@
+"""
+Whole-repository analysis from a zip or tarball upload.
+
+Members are read straight out of the archive (nothing is extracted to
+disk) and fanned out to a process pool, so the CPU-bound rule work runs
+on every core instead of queueing behind the GIL. Each file gets the
+sandbox's line-length limit and time budget (sandbox.analyze_with_deadline),
+so one hostile file can't hold a pool worker indefinitely; its findings
+are kept up to where it stopped and the archive counts it as truncated.
+"""
+import multiprocessing
+import posixpath
+import tarfile
+import threading
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.db import transaction
+
+from . import search
+from .analysis_cache import analysis_cache, cache_key
+from .models import CodeArchive, CodeSnippet
+from .persistence import bulk_create_findings
+from .replicas import pin_to_primary
+from .rules import count_lines
+from .sandbox import BudgetedResult, analyze_with_deadline
+
+EXTENSION_LANGUAGES = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.java': 'java',
+    '.cpp': 'cpp',
+    '.cc': 'cpp',
+    '.h': 'cpp',
+    '.hpp': 'cpp',
+    '.html': 'html',
+    '.css': 'html',
+}
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def language_for_path(path):
+    return EXTENSION_LANGUAGES.get(posixpath.splitext(path)[1].lower())
+
+
+def _decode(data):
+    if b'\0' in data:
+        return None
+    return data.decode('utf-8', errors='replace')
+
+
+def iter_archive_members(fileobj, max_file_size):
+    """
+    Yield (path, raw bytes or None) for every regular file in a zip or tar
+    archive. Members larger than max_file_size yield None instead of
+    being read.
+    """
+    fileobj.seek(0)
+    if zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                if info.file_size > max_file_size:
+                    yield info.filename, None
+                    continue
+                with archive.open(info) as member:
+                    data = member.read(max_file_size + 1)
+                yield info.filename, data if len(data) <= max_file_size else None
+        return
+
+    fileobj.seek(0)
+    try:
+        # 'r|*' reads the tarball as a stream, in member order, and
+        # handles gzip/bz2/xz compression transparently.
+        with tarfile.open(fileobj=fileobj, mode='r|*') as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                if member.size > max_file_size:
+                    yield member.name, None
+                    continue
+                yield member.name, archive.extractfile(member).read()
+    except tarfile.TarError as e:
+        raise ArchiveError('Upload is not a zip or tar archive') from e
+
+
+def iter_source_files(fileobj, max_files=None, max_file_size=None):
+    """
+    Yield (path, code, language) for analyzable members, skipping
+    binaries, unknown extensions and oversized files.
+    Returns the number of skipped members as the generator's value.
+    """
+    max_files = max_files or getattr(settings, 'ANALYSIS_ARCHIVE_MAX_FILES', 2000)
+    max_file_size = max_file_size or getattr(settings, 'ANALYSIS_ARCHIVE_MAX_FILE_SIZE', 1024 * 1024)
+    count = skipped = 0
+    for path, data in iter_archive_members(fileobj, max_file_size):
+        language = language_for_path(path)
+        code = _decode(data) if (language and data is not None) else None
+        if code is None or count >= max_files:
+            skipped += 1
+            continue
+        count += 1
+        yield path, code, language
+    return skipped
+
+
+class _InlineExecutor:
+    """Executor stand-in used when ANALYSIS_PROCESSES is 0"""
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool():
+    global _pool
+    processes = getattr(settings, 'ANALYSIS_PROCESSES', None)
+    if processes == 0:
+        return _InlineExecutor()
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=processes,
+                # Don't fork a web process that may be running threads;
+                # spawned workers configure Django before taking tasks.
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            )
+        return _pool
+
+
+def discard_process_pool(pool):
+    """Drop a pool whose worker died so the next upload starts a fresh one"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def analyze_files(files, executor=None, max_pending=None):
+    """
+    Analyze (path, code, language) tuples in parallel and yield
+    (path, code, language, BudgetedResult) as results come back. Cached
+    results skip the pool entirely; only complete results are cached.
+    """
+    executor = executor or get_process_pool()
+    max_pending = max_pending or 4 * (getattr(settings, 'ANALYSIS_PROCESSES', None) or multiprocessing.cpu_count())
+    pending = {}
+
+    def drain(return_when):
+        done, _ = wait(pending, return_when=return_when)
+        for future in done:
+            path, code, language, key = pending.pop(future)
+            result = future.result()
+            if not result.truncated:
+                analysis_cache.set(key, result.issues)
+            yield path, code, language, result
+
+    for path, code, language in files:
+        key = cache_key(code, language)
+        cached = analysis_cache.get(key)
+        if cached is not None:
+            result = BudgetedResult([dict(issue) for issue in cached], analyzed_lines=count_lines(code))
+            yield path, code, language, result
+            continue
+        pending[executor.submit(analyze_with_deadline, code, language)] = (path, code, language, key)
+        # Don't read ahead of the pool by more than a few tasks per worker
+        if len(pending) >= max_pending:
+            yield from drain(FIRST_COMPLETED)
+    while pending:
+        yield from drain(FIRST_COMPLETED)
+
+
+def analyze_archive(fileobj, title, user, executor=None):
+    """
+    Analyze every source file in an uploaded archive; returns the
+    CodeArchive. Raises ArchiveError if a pool worker died (killed or out
+    of memory); the pool is replaced for the next upload.
+    """
+    executor = executor or get_process_pool()
+    files = iter_source_files(fileobj)
+    results = []
+    skipped = 0
+
+    def collect():
+        nonlocal skipped
+        skipped = yield from files
+
+    try:
+        for path, code, language, result in analyze_files(collect(), executor):
+            results.append((path, code, language, result))
+    except BrokenProcessPool as e:
+        discard_process_pool(executor)
+        raise ArchiveError('An analysis worker stopped unexpectedly; please upload the archive again') from e
+
+    results.sort(key=lambda result: result[0])
+    with transaction.atomic():
+        archive = CodeArchive.objects.create(
+            title=title,
+            created_by=user,
+            file_count=len(results),
+            skipped_count=skipped,
+            truncated_count=sum(1 for *_, result in results if result.truncated),
+            issue_count=sum(len(result.issues) for *_, result in results),
+        )
+        snippets = CodeSnippet.objects.bulk_create([
+            CodeSnippet(
+                title=path[-200:],
+                code=code,
+                language=language,
+                created_by=user,
+                analyzed=True,
+                archive=archive,
+            )
+            for path, code, language, _ in results
+        ])
+        bulk_create_findings(
+            (snippet, result.issues) for snippet, (*_, result) in zip(snippets, results)
+        )
+        # bulk_create skips the post_save signals that normally index
+        # snippets and pin their owner to the primary
+        search.index_objects(snippets)
+        pin_to_primary(user.pk)
+    return archive
@@ -0,0 +1,148 @@
+import ast
+import time
+
+from .profiling import current_profile
+from .rules import (
+    BARE_EXCEPT, NONE_COMPARISON, OLD_STYLE_CLASS, PRINT_STATEMENT, PYTHON_RULES, count_lines, split_lines,
+)
+
+
+def _is_print_name(node):
+    return isinstance(node, ast.Name) and node.id == 'print'
+
+
+class PythonASTAnalyzer(ast.NodeVisitor):
+    """
+    Runs every Python rule in a single walk over the parsed tree.
+
+    Each rule is a visit_* method, so a node is only looked at by the
+    rules that care about its type. With a profile, every node a rule
+    looks at counts as an attempt.
+    """
+
+    def __init__(self, lines, profile=None):
+        self.lines = lines
+        self.issues = []
+        self.profile = profile
+        self._seen = set()
+
+    def discard(self, mark):
+        """Forget the findings after the first `mark`"""
+        for issue in self.issues[mark:]:
+            self._seen.discard((issue['line_number'], issue['issue_type']))
+        del self.issues[mark:]
+
+    def attempt(self, rule):
+        if self.profile is not None:
+            self.profile.rule(rule).attempts += 1
+
+    def report(self, node, rule):
+        key = (node.lineno, rule.issue_type)
+        if key in self._seen:
+            return
+        self._seen.add(key)
+        line = self.lines[node.lineno - 1].strip()
+        if self.profile is None:
+            self.issues.append(rule.finding(node.lineno, line))
+            return
+        counter = self.profile.rule(rule)
+        counter.hits += 1
+        start = time.perf_counter()
+        self.issues.append(rule.finding(node.lineno, line))
+        counter.fix_seconds += time.perf_counter() - start
+
+    def visit_Expr(self, node):
+        # `print`, `print >>f, x` and `print, x` still parse under Python 3
+        value = node.value
+        if isinstance(value, ast.Tuple) and value.elts:
+            value = value.elts[0]
+        if isinstance(value, ast.BinOp) and isinstance(value.op, ast.RShift):
+            value = value.left
+        self.attempt(PRINT_STATEMENT)
+        if _is_print_name(value):
+            self.report(node, PRINT_STATEMENT)
+        self.generic_visit(node)
+
+    def visit_Compare(self, node):
+        self.attempt(NONE_COMPARISON)
+        operands = [node.left, *node.comparators]
+        for op, left, right in zip(node.ops, operands, operands[1:]):
+            if not isinstance(op, (ast.Eq, ast.NotEq)):
+                continue
+            if any(isinstance(side, ast.Constant) and side.value is None for side in (left, right)):
+                self.report(node, NONE_COMPARISON)
+                break
+        self.generic_visit(node)
+
+    def visit_ExceptHandler(self, node):
+        self.attempt(BARE_EXCEPT)
+        if node.type is None:
+            self.report(node, BARE_EXCEPT)
+        self.generic_visit(node)
+
+    def visit_ClassDef(self, node):
+        self.attempt(OLD_STYLE_CLASS)
+        if not node.bases and not node.keywords:
+            self.report(node, OLD_STYLE_CLASS)
+        self.generic_visit(node)
+
+
+def _by_line(issues):
+    return sorted(issues, key=lambda issue: issue['line_number'])
+
+
+def analyze_python_code(code):
+    """
+    Analyze Python code from its syntax tree.
+    Falls back to the line-based rules when the code does not parse
+    (e.g. Python 2 sources).
+    """
+    return [issue for _, issues in analyze_python_code_chunks(code) for issue in issues]
+
+
+def analyze_python_code_chunks(code, chunk_lines=None):
+    """
+    analyze_python_code() a group of top-level statements at a time, for
+    callers that may run out of time: yields (last line covered, findings
+    up to it) each time the walk gets chunk_lines further. Without
+    chunk_lines everything comes in one group. A statement nested too
+    deeply to walk is checked with the line rules instead.
+    """
+    profile = current_profile()
+    start = time.perf_counter()
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError, RecursionError):
+        tree = None
+    if profile is not None:
+        profile.phase('ast.parse', time.perf_counter() - start)
+    if tree is None:
+        if chunk_lines:
+            yield from PYTHON_RULES.scan_chunks(split_lines(code), chunk_lines)
+        else:
+            yield count_lines(code), PYTHON_RULES.scan(code)
+        return
+
+    lines = split_lines(code)
+    analyzer = PythonASTAnalyzer(lines, profile)
+    walked = 0.0
+    covered = reported = 0
+    for node in tree.body:
+        mark = len(analyzer.issues)
+        start = time.perf_counter()
+        try:
+            analyzer.visit(node)
+        except RecursionError:
+            analyzer.discard(mark)
+            analyzer.issues.extend(PYTHON_RULES.scan_lines(lines[covered:node.end_lineno], covered + 1))
+        walked += time.perf_counter() - start
+        if chunk_lines and node.end_lineno - reported >= chunk_lines:
+            yield node.end_lineno, _by_line(analyzer.issues)
+            analyzer.issues = []
+            reported = node.end_lineno
+        covered = node.end_lineno
+    if profile is not None:
+        profile.phase('ast.walk', walked)
+        profile.runs += 1
+        profile.lines += len(lines)
+    yield len(lines), _by_line(analyzer.issues)
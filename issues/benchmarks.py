@@ -0,0 +1,306 @@
+"""
+Benchmark suite for the analyzers and the hottest views.
+
+generate_dataset() fills the database with synthetic users, projects,
+issues, comments and analyzed snippets using bulk inserts. run_suite()
+then times analyze_code over small, medium and huge inputs and renders
+dashboard, issue_list and code_results through the test client, counting
+queries; dashboard and issue_list are also timed with the user's stats
+and fragments invalidated before each request. The result is a plain dict meant to be dumped as
+JSON and compared between runs with compare().
+
+run_load() measures throughput instead: it keeps a running server busy
+from several threads and reports requests per second (see the bench_db
+command).
+"""
+import itertools
+import platform
+import random
+import statistics
+import threading
+import time
+from dataclasses import asdict, dataclass
+from urllib.parse import urlencode
+
+import django
+import httpx
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .counters import count_created
+from .models import CodeSnippet, Comment, Issue, Project
+from .pagination import encode_cursor
+from .persistence import bulk_create_findings
+from .stats import invalidate_dashboard_stats
+from .utils import analyze_code, analyze_code_uncached
+
+SAMPLE_LINES = [
+    'def handler(request, *args, **kwargs):',
+    '    value = compute(request.GET.get("q"), default=42)',
+    '    if value == None:',
+    '        print "no value"',
+    '    try:',
+    '        result = do_work(value)',
+    '    except:',
+    '        pass',
+    '    # just a comment',
+    '',
+    'class Thing:',
+    'class Widget(Base):',
+    '    return [item for item in result if item.enabled]',
+    '    logger.info("processed %s items", len(result))',
+    '    data = {"key": value, "other": other_value}',
+    '    for index, row in enumerate(rows):',
+]
+
+ANALYZE_SIZES = {'small': 50, 'medium': 2000, 'huge': 50000}
+
+BATCH_SIZE = 1000
+
+
+def generate_code(lines, seed=0):
+    rng = random.Random(seed)
+    return '\n'.join(rng.choice(SAMPLE_LINES) for _ in range(lines))
+
+
+@dataclass
+class DatasetSize:
+    """How much data to generate; everything but `users` is per user"""
+    users: int = 3
+    projects: int = 20
+    issues: int = 2000
+    comments: int = 4000
+    snippets: int = 50
+    snippet_lines: int = 200
+
+
+def generate_dataset(size, seed=0):
+    """
+    Bulk-insert a synthetic dataset and return the generated users.
+    Snippets are analyzed and stored with their findings, as the results
+    page would see them.
+    """
+    rng = random.Random(seed)
+    priorities = [value for value, _ in Issue.PRIORITY_CHOICES]
+    statuses = [value for value, _ in Issue.STATUS_CHOICES]
+    prefix = f'bench-{seed}-{rng.getrandbits(32):08x}'
+
+    users = [User(username=f'{prefix}-user{n}') for n in range(size.users)]
+    for user in users:
+        user.set_unusable_password()
+    users = User.objects.bulk_create(users)
+
+    for user in users:
+        projects = Project.objects.bulk_create(
+            [
+                Project(name=f'Project {n}', description='Generated project', created_by=user)
+                for n in range(size.projects)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        issues = Issue.objects.bulk_create(
+            [
+                Issue(
+                    title=f'Issue {n}', description=f'Generated issue {n} for {user.username}',
+                    project=rng.choice(projects), priority=rng.choice(priorities),
+                    status=rng.choice(statuses), assigned_to=rng.choice(users + [None]),
+                    created_by=user,
+                )
+                for n in range(size.issues if projects else 0)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        count_created(issues)
+        Comment.objects.bulk_create(
+            [
+                Comment(issue=rng.choice(issues), user=rng.choice(users), text=f'Comment {n}')
+                for n in range(size.comments if issues else 0)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        snippets = CodeSnippet.objects.bulk_create(
+            [
+                CodeSnippet(
+                    title=f'Snippet {n}', code=generate_code(size.snippet_lines, rng.random()),
+                    language='python', created_by=user, analyzed=True,
+                )
+                for n in range(size.snippets)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        bulk_create_findings([(snippet, analyze_code(snippet.code, snippet.language)) for snippet in snippets])
+    return users
+
+
+def measure(func, repeat):
+    """Call func repeat times; wall-clock stats in milliseconds plus query counts"""
+    timings, queries = [], []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(len(context.captured_queries))
+    return {
+        'runs': repeat,
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'max_ms': round(max(timings), 3),
+        'first_queries': queries[0],
+        'queries': queries[-1],
+    }
+
+
+def analyzer_scenarios(repeat, sizes=None, language='python', seed=0):
+    """
+    analyze_code over each input size: `cold` runs the analyzer itself,
+    `cached` goes through the result cache after one priming call.
+    """
+    # Load the backend and compile its rules outside the timings
+    analyze_code_uncached(generate_code(10, seed), language)
+    results = {}
+    for label, lines in (sizes or ANALYZE_SIZES).items():
+        code = generate_code(lines, seed)
+        cold = measure(lambda: analyze_code_uncached(code, language), repeat)
+        cold['lines_per_second'] = round(lines / (cold['median_ms'] / 1000)) if cold['median_ms'] else None
+        results[f'analyze_code.{label}.cold'] = cold
+        analyze_code(code, language)
+        results[f'analyze_code.{label}.cached'] = measure(lambda: analyze_code(code, language), repeat)
+    return results
+
+
+def view_scenarios(user, repeat):
+    """Render the hot pages for one user through the test client"""
+    client = Client()
+    client.force_login(user)
+    snippet = CodeSnippet.objects.filter(created_by=user).order_by('id').first()
+    issues = Issue.objects.filter(created_by=user).order_by('-created_at', '-id')
+    middle = issues[issues.count() // 2] if issues.exists() else None
+    urls = {
+        'view.dashboard': reverse('dashboard'),
+        'view.issue_list': reverse('issue_list'),
+        'view.issue_list.filtered': reverse('issue_list') + '?status=Open&priority=High',
+    }
+    if middle:
+        urls['view.issue_list.deep_page'] = reverse('issue_list') + '?' + urlencode({'after': encode_cursor(middle)})
+    if snippet:
+        urls['view.code_results'] = reverse('code_results', args=[snippet.id])
+
+    def get(url):
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f'GET {url} returned {response.status_code}')
+
+    results = {}
+    for name, url in urls.items():
+        results[name] = measure(lambda url=url: get(url), repeat)
+    # The same pages right after a write: stats and template fragments are
+    # rebuilt on every request. Only this user's entries are retired, so the
+    # configured cache is never cleared.
+    for name in ('view.dashboard', 'view.issue_list'):
+        results[f'{name}.cold'] = measure(
+            lambda url=urls[name]: (invalidate_dashboard_stats(user.pk), get(url)), repeat,
+        )
+    return results
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def run_load(base_url, paths, cookies=None, concurrency=8, duration=10.0):
+    """
+    GET paths round-robin from `concurrency` threads, each with its own
+    keep-alive connection, for `duration` seconds. Returns requests per
+    second and latency percentiles of the successful requests.
+    """
+    latencies, errors = [], 0
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker(offset):
+        nonlocal errors
+        timings, failed = [], 0
+        with httpx.Client(base_url=base_url, cookies=cookies, timeout=30) as client:
+            for n in itertools.count(offset):
+                if time.monotonic() >= deadline:
+                    break
+                start = time.perf_counter()
+                try:
+                    ok = client.get(paths[n % len(paths)]).status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    timings.append((time.perf_counter() - start) * 1000)
+                else:
+                    failed += 1
+        with lock:
+            latencies.extend(timings)
+            errors += failed
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.5) or 0, 2),
+        'p95_ms': round(percentile(latencies, 0.95) or 0, 2),
+        'p99_ms': round(percentile(latencies, 0.99) or 0, 2),
+    }
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'machine': platform.machine(),
+    }
+
+
+def run_suite(size=None, repeat=5, seed=0, analyze_sizes=None, scenarios=('analyzer', 'views')):
+    """Generate the dataset (for the view scenarios) and run the benchmarks"""
+    size = size or DatasetSize()
+    results = {}
+    if 'analyzer' in scenarios:
+        results.update(analyzer_scenarios(repeat, analyze_sizes, seed=seed))
+    if 'views' in scenarios:
+        users = generate_dataset(size, seed)
+        if users:
+            results.update(view_scenarios(users[0], repeat))
+    return {
+        'environment': environment(),
+        'dataset': asdict(size),
+        'repeat': repeat,
+        'scenarios': results,
+    }
+
+
+def compare(baseline, current, metric='median_ms'):
+    """
+    Rows of (scenario, baseline, current, percent change) for scenarios in
+    both runs; positive changes are slowdowns.
+    """
+    rows = []
+    for name, result in current['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name, {}).get(metric)
+        after = result.get(metric)
+        if before is None or after is None:
+            continue
+        change = (after - before) / before * 100 if before else 0.0
+        rows.append((name, before, after, round(change, 1)))
+    return rows
@@ -0,0 +1,144 @@
+"""
+Denormalized per-project issue counts.
+
+Project.issue_count, open_count, in_progress_count and critical_count
+(unresolved Critical issues) are kept current with F() updates in the
+same transaction as the Issue change:
+
+- Issue.save() locks and reads the row's stored project, status and
+  priority first, then moves the counts from the old values to the new
+  (see the signals in issues/signals.py)
+- deleting an issue decrements its project, unless the project itself
+  is being deleted
+- bulk_create callers (the importer, the benchmark data) call
+  count_created() themselves
+
+QuerySet.update() bypasses all of this; `reconcile_counters` recounts
+and fixes any drift.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+
+from .models import Issue, Project
+
+COUNTERS = ('issue_count', 'open_count', 'in_progress_count', 'critical_count')
+
+ACTIVE_STATUSES = ('Open', 'In Progress')
+
+# The same definitions as querysets, for recounting
+COUNTER_FILTERS = {
+    'issue_count': Q(),
+    'open_count': Q(status='Open'),
+    'in_progress_count': Q(status='In Progress'),
+    'critical_count': Q(priority='Critical', status__in=ACTIVE_STATUSES),
+}
+
+
+def counted(status, priority):
+    """The counters an issue with this status and priority adds one to"""
+    names = ['issue_count']
+    if status == 'Open':
+        names.append('open_count')
+    elif status == 'In Progress':
+        names.append('in_progress_count')
+    if priority == 'Critical' and status in ACTIVE_STATUSES:
+        names.append('critical_count')
+    return names
+
+
+def _add(deltas, state, sign):
+    project_id, status, priority = state
+    for name in counted(status, priority):
+        deltas[project_id][name] += sign
+
+
+def apply_deltas(deltas):
+    """Add {project_id: {counter: delta}} to the projects, one UPDATE per project"""
+    for project_id, changes in deltas.items():
+        values = {
+            # Drift could take a count below zero; clamp until reconciled
+            name: F(name) + delta if delta > 0 else Greatest(F(name) + delta, 0)
+            for name, delta in changes.items() if delta
+        }
+        if values:
+            Project.objects.filter(pk=project_id).update(**values)
+
+
+def issue_state(issue):
+    return issue.project_id, issue.status, issue.priority
+
+
+def stored_state(issue):
+    """The issue's counted fields as stored, locking the row; None for new issues"""
+    if issue._state.adding or issue.pk is None:
+        return None
+    return Issue.objects.select_for_update().filter(pk=issue.pk).values_list('project', 'status', 'priority').first()
+
+
+def issue_saved(issue, before):
+    after = issue_state(issue)
+    if before == after:
+        return
+    deltas = defaultdict(Counter)
+    if before is not None:
+        _add(deltas, before, -1)
+    _add(deltas, after, 1)
+    apply_deltas(deltas)
+
+
+def issue_deleted(issue):
+    deltas = defaultdict(Counter)
+    _add(deltas, issue_state(issue), -1)
+    apply_deltas(deltas)
+
+
+def count_created(issues):
+    """Count issues inserted with bulk_create"""
+    deltas = defaultdict(Counter)
+    for issue in issues:
+        _add(deltas, issue_state(issue), 1)
+    apply_deltas(deltas)
+
+
+def recount(project_ids):
+    """{project_id: {counter: actual count}} for the projects"""
+    counts = {project_id: dict.fromkeys(COUNTERS, 0) for project_id in project_ids}
+    rows = (
+        Issue.objects.filter(project__in=project_ids).values('project')
+        .annotate(**{name: Count('id', filter=condition) for name, condition in COUNTER_FILTERS.items()})
+    )
+    for row in rows:
+        counts[row.pop('project')] = row
+    return counts
+
+
+def reconcile(projects=None, batch_size=500):
+    """
+    Recount the projects' issues and fix counters that drifted. Each batch
+    locks its projects before counting, so issue changes running at the
+    same time either wait for the fix or land on top of it. Returns
+    [(project, {counter: (stored, actual)})] for the projects fixed.
+    """
+    queryset = (projects if projects is not None else Project.objects.all()).order_by('pk')
+    ids = list(queryset.values_list('pk', flat=True))
+    fixed = []
+    for start in range(0, len(ids), batch_size):
+        with transaction.atomic():
+            batch = list(Project.objects.select_for_update().filter(pk__in=ids[start:start + batch_size]))
+            counts = recount([project.pk for project in batch])
+            changed = []
+            for project in batch:
+                drift = {
+                    name: (getattr(project, name), counts[project.pk][name])
+                    for name in COUNTERS if getattr(project, name) != counts[project.pk][name]
+                }
+                if drift:
+                    for name, (_, actual) in drift.items():
+                        setattr(project, name, actual)
+                    changed.append(project)
+                    fixed.append((project, drift))
+            Project.objects.bulk_update(changed, COUNTERS)
+    return fixed
@@ -0,0 +1,178 @@
+"""
+In-process notifications of analysis progress, for server-sent events.
+
+Analysis jobs publish to a per-snippet channel as they go:
+
+- `progress`: {"percent": 0-100, "stage": ...}
+- `finding`: one finding, as soon as it is final
+- `done`: {"status", "issues_count", "error", "truncated"}
+
+Each channel keeps the events of the snippet's latest run, so a page that
+subscribes after the job started still gets everything from the start.
+Subscribers wait on a queue instead of polling the database: an
+asyncio.Queue for async consumers, a thread-safe queue otherwise.
+Publishing is safe from any thread.
+
+The broker lives in one process. Jobs drained by the `analysis_worker`
+command elsewhere aren't seen live; the stream then falls back to the
+stored results (see views.code_results_events).
+"""
+import asyncio
+import itertools
+import json
+import queue
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+
+from django.conf import settings
+
+PROGRESS = 'progress'
+FINDING = 'finding'
+DONE = 'done'
+
+
+@dataclass(frozen=True)
+class Event:
+    id: int
+    name: str
+    data: dict
+
+    def encode(self):
+        """The event in the text/event-stream format"""
+        return f'id: {self.id}\nevent: {self.name}\ndata: {json.dumps(self.data)}\n\n'
+
+
+class Subscription:
+    """Events of one channel for one consumer; use as a (async) context manager"""
+
+    def __init__(self, broker, key, backlog, loop=None):
+        self.broker = broker
+        self.key = key
+        self.backlog = backlog
+        self.loop = loop
+        self._queue = asyncio.Queue() if loop is not None else queue.SimpleQueue()
+
+    def put(self, event):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._queue.put_nowait, event)
+        else:
+            self._queue.put(event)
+
+    def get(self, timeout=None):
+        """The next event, or None after `timeout` seconds without one"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    async def aget(self, timeout=None):
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+
+class _Channel:
+    __slots__ = ('events', 'subscribers')
+
+    def __init__(self, max_events):
+        self.events = deque(maxlen=max_events)
+        self.subscribers = set()
+
+
+class Broker:
+    """
+    Per-key event channels. Only the latest `max_channels` keys keep their
+    events; older ones are dropped once nobody is subscribed to them.
+    """
+
+    def __init__(self, max_channels=256, max_events=1000):
+        self.max_channels = max_channels
+        self.max_events = max_events
+        self._channels = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _channel(self, key):
+        channel = self._channels.get(key)
+        if channel is None:
+            channel = self._channels[key] = _Channel(self.max_events)
+        self._channels.move_to_end(key)
+        return channel
+
+    def _prune(self):
+        for key in list(self._channels):
+            if len(self._channels) <= self.max_channels:
+                return
+            if not self._channels[key].subscribers:
+                del self._channels[key]
+
+    def publish(self, key, name, data, reset=False):
+        """Send an event to the key's subscribers; reset=True starts a new run"""
+        with self._lock:
+            channel = self._channel(key)
+            if reset:
+                channel.events.clear()
+            event = Event(next(self._ids), name, data)
+            channel.events.append(event)
+            for subscription in channel.subscribers:
+                subscription.put(event)
+            self._prune()
+        return event
+
+    def subscribe(self, key, last_event_id=None, loop=None):
+        """
+        Start receiving the key's events. The subscription's backlog holds
+        the events of the current run after `last_event_id`. Pass the
+        running loop to wait for events with aget().
+        """
+        with self._lock:
+            channel = self._channel(key)
+            backlog = [event for event in channel.events if last_event_id is None or event.id > last_event_id]
+            subscription = Subscription(self, key, backlog, loop)
+            channel.subscribers.add(subscription)
+            self._prune()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            channel = self._channels.get(subscription.key)
+            if channel is not None:
+                channel.subscribers.discard(subscription)
+
+
+broker = Broker(
+    max_channels=getattr(settings, 'ANALYSIS_EVENTS_CHANNELS', 256),
+    max_events=getattr(settings, 'ANALYSIS_EVENTS_BACKLOG', 1000),
+)
+
+
+def publish_progress(snippet_id, percent, stage, reset=False):
+    return broker.publish(snippet_id, PROGRESS, {'percent': percent, 'stage': stage}, reset=reset)
+
+
+def publish_findings(snippet_id, findings):
+    for finding in findings:
+        broker.publish(snippet_id, FINDING, finding)
+
+
+def publish_done(snippet_id, status, issues_count=None, error='', truncated=''):
+    return broker.publish(snippet_id, DONE, {
+        'status': status, 'issues_count': issues_count, 'error': error, 'truncated': truncated,
+    })
@@ -0,0 +1,34 @@
+from .models import Issue
+
+
+def issue_filters(request):
+    """Validated ?status=&priority=&project=&assigned_to= filters"""
+    filters = {}
+    status = request.GET.get('status')
+    if status in dict(Issue.STATUS_CHOICES):
+        filters['status'] = status
+    priority = request.GET.get('priority')
+    if priority in dict(Issue.PRIORITY_CHOICES):
+        filters['priority'] = priority
+    project = request.GET.get('project', '')
+    if project.isdigit():
+        filters['project'] = project
+    assigned_to = request.GET.get('assigned_to', '')
+    if assigned_to.isdigit() or assigned_to == 'none':
+        filters['assigned_to'] = assigned_to
+    return filters
+
+
+def filter_issues(issues, filters):
+    """Apply filters from issue_filters() to an Issue queryset"""
+    if 'status' in filters:
+        issues = issues.filter(status=filters['status'])
+    if 'priority' in filters:
+        issues = issues.filter(priority=filters['priority'])
+    if 'project' in filters:
+        issues = issues.filter(project_id=filters['project'])
+    if filters.get('assigned_to') == 'none':
+        issues = issues.filter(assigned_to__isnull=True)
+    elif 'assigned_to' in filters:
+        issues = issues.filter(assigned_to_id=filters['assigned_to'])
+    return issues
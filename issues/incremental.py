@@ -0,0 +1,193 @@
+"""
+Incremental re-analysis of edited snippets.
+
+The stored code is diffed against the new code line by line. Findings on
+unchanged lines are kept and renumbered with a single UPDATE, so the
+database work is the size of the edit rather than the size of the file.
+
+Backends whose analysis is the line scan only check the inserted or
+replaced lines. The others can't: an edit to one line can turn the lines
+after it into a string (Python's syntax tree) or a block comment, or
+back. They analyze the whole new code the way a job would, through the
+analysis cache and, with ANALYSIS_SANDBOX on, in a sandbox worker; the
+stored rows are diffed against the result, so the findings never depend
+on the edit history.
+
+Either way the analysis stays within the sandbox's line-length limit and
+time budget; an edit that runs out of either is queued for a full,
+sandboxed analysis instead.
+"""
+import time
+from bisect import bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Q, When
+
+from .analyzers import get_analyzer
+from .jobs import enqueue_analysis
+from .models import CodeIssue
+from .persistence import ISSUE_FIELDS, bulk_create_issues, delete_findings, issue_key
+from .rules import split_lines
+from .sandbox import LineGuard
+from .utils import analyze_code_budgeted
+
+# Every shifted block is one WHEN in the UPDATE; past this many it's
+# cheaper to start over.
+MAX_SHIFTED_BLOCKS = 200
+
+
+@dataclass
+class Reanalysis:
+    incremental: bool
+    checked_lines: int = 0
+    shifted: int = 0
+    deleted: int = 0
+    created: int = 0
+
+
+def diff_lines(old, new):
+    """
+    SequenceMatcher opcodes turning the old lines into the new ones. The
+    common prefix and suffix are trimmed first, so a small edit to a big
+    file only runs the (quadratic) matcher over the changed middle.
+    """
+    limit = min(len(old), len(new))
+    prefix = 0
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+
+    opcodes = [('equal', 0, prefix, 0, prefix)] if prefix else []
+    matcher = SequenceMatcher(None, old[prefix:len(old) - suffix], new[prefix:len(new) - suffix], autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if i1 == i2 and j1 == j2:
+            continue
+        opcodes.append((tag, i1 + prefix, i2 + prefix, j1 + prefix, j2 + prefix))
+    if suffix:
+        opcodes.append(('equal', len(old) - suffix, len(old), len(new) - suffix, len(new)))
+    return opcodes
+
+
+def _needs_full_analysis(snippet, analyzer, old, new, opcodes):
+    if not snippet.analyzed or analyzer is None or analyzer.rules is None:
+        return True
+    if snippet.jobs.filter(status__in=['queued', 'running']).exists():
+        return True
+    changed = [
+        line
+        for tag, i1, i2, j1, j2 in opcodes if tag != 'equal'
+        for line in old[i1:i2] + new[j1:j2]
+    ]
+    max_ratio = getattr(settings, 'ANALYSIS_INCREMENTAL_MAX_CHANGE', 0.5)
+    if len(changed) > max_ratio * max(len(old) + len(new), 1):
+        return True
+    return sum(1 for tag, i1, _, j1, _ in opcodes if tag == 'equal' and i1 != j1) > MAX_SHIFTED_BLOCKS
+
+
+def diff_stored_findings(snippet, issues, opcodes):
+    """
+    Match the snippet's stored findings, renumbered through the diff,
+    against a full analysis of the new code. Returns (pks of rows that no
+    longer apply, findings to insert); rows on changed lines never match.
+    """
+    blocks = [(i1, i2, j1 - i1) for tag, i1, i2, j1, _ in opcodes if tag == 'equal']
+    starts = [i1 for i1, _, _ in blocks]
+    wanted = defaultdict(list)
+    for issue in issues:
+        wanted[issue_key(issue)].append(issue)
+
+    stale = []
+    rows = CodeIssue.objects.filter(snippet=snippet).values_list('pk', *ISSUE_FIELDS)
+    for pk, line_number, *values in rows.iterator(chunk_size=2000):
+        index = bisect_right(starts, line_number - 1) - 1
+        matches = None
+        if index >= 0 and line_number <= blocks[index][1]:
+            matches = wanted.get((line_number + blocks[index][2], *values))
+        if matches:
+            matches.pop()
+        else:
+            stale.append(pk)
+    return stale, [issue for remaining in wanted.values() for issue in remaining]
+
+
+def _analyze_edit(snippet, analyzer, code, new, opcodes):
+    """Findings for the edited code within the budgets, or None if it ran out"""
+    if not analyzer.line_local:
+        result = analyze_code_budgeted(
+            code, snippet.language, in_process=not getattr(settings, 'ANALYSIS_SANDBOX', False),
+        )
+        return None if result.truncated else result.issues
+    deadline = time.monotonic() + getattr(settings, 'ANALYSIS_TIME_BUDGET', 10)
+    issues = []
+    for tag, _, _, j1, j2 in opcodes:
+        if tag != 'equal':
+            guard = LineGuard(new[j1:j2], deadline=deadline)
+            issues.extend(analyzer.scan_lines(guard, start=j1 + 1))
+            if guard.truncated:
+                return None
+    return issues
+
+
+def reanalyze_snippet(snippet, code):
+    """
+    Save edited code for a snippet and bring its findings up to date.
+
+    Small edits keep the findings on unchanged lines and only write the
+    rows that changed; anything else (unanalyzed snippets, big rewrites,
+    edits that run out of analysis budget) is queued for a full analysis
+    like a new paste.
+    """
+    old = split_lines(snippet.code)
+    new = split_lines(code)
+    opcodes = diff_lines(old, new)
+    analyzer = get_analyzer(snippet.language)
+
+    issues = None
+    if not _needs_full_analysis(snippet, analyzer, old, new, opcodes):
+        issues = _analyze_edit(snippet, analyzer, code, new, opcodes)
+    if issues is None:
+        with transaction.atomic():
+            snippet.code = code
+            snippet.analyzed = False
+            snippet.save(update_fields=['code', 'analyzed'])
+            enqueue_analysis(snippet)
+        return Reanalysis(incremental=False)
+
+    result = Reanalysis(incremental=True)
+    kept, shifts = [], []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == 'equal':
+            lines = Q(line_number__gte=i1 + 1, line_number__lte=i2)
+            kept.append(lines)
+            if i1 != j1:
+                shifts.append(When(lines, then=F('line_number') + (j1 - i1)))
+        else:
+            result.checked_lines += j2 - j1
+
+    with transaction.atomic():
+        findings = CodeIssue.objects.filter(snippet=snippet)
+        if analyzer.line_local:
+            stale = findings.exclude(reduce(or_, kept)) if kept else findings
+            result.deleted, _ = stale.delete()
+        else:
+            stale, issues = diff_stored_findings(snippet, issues, opcodes)
+            delete_findings(stale)
+            result.deleted = len(stale)
+        if shifts:
+            # Renumbered rows are matched on their old line numbers; one
+            # UPDATE moves every unchanged block at once.
+            result.shifted = findings.filter(reduce(or_, (when.condition for when in shifts))).update(
+                line_number=Case(*shifts, default=F('line_number'))
+            )
+        result.created = len(bulk_create_issues(snippet, issues))
+        snippet.code = code
+        snippet.save(update_fields=['code'])
+    return result
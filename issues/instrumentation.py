@@ -0,0 +1,260 @@
+"""
+Per-request performance instrumentation.
+
+PerformanceMiddleware times each request and, through
+connection.execute_wrapper, counts its database queries and the time
+spent in them. The numbers are:
+
+- sent back as a Server-Timing header (SERVER_TIMING)
+- aggregated per view into `metrics`, served in the Prometheus text
+  format by metrics_view at /metrics, together with the per-rule
+  analyzer totals from issues/profiling.py (to scrapers holding
+  METRICS_TOKEN, or to staff users when no token is set)
+- checked against QUERY_BUDGETS, a {url name: max queries} mapping;
+  a view over budget is logged, or raises QueryBudgetExceeded when
+  QUERY_BUDGET_ACTION is 'raise' (as the tests set it)
+
+Metrics are per process; with several workers Prometheus should scrape
+each of them.
+
+Connections are per thread, and under ASGI the ORM runs in whichever
+thread sync_to_async picks, so the query counter can't be attached to
+the connections the middleware sees. Instead every connection of a
+request's thread gets one permanent execute wrapper (installed on
+request_started, which Django sends from that thread), and it counts
+into the QueryCounter of the request's context, which sync_to_async
+carries over.
+"""
+import hmac
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+
+from . import profiling
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNRESOLVED_VIEW = '<unresolved>'
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryCounter:
+    """An execute_wrapper that counts queries and the time spent running them"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+_current_counter = ContextVar('query_counter', default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    """The execute wrapper on every connection; a no-op outside a request"""
+    counter = _current_counter.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    return counter(execute, sql, params, many, context)
+
+
+@receiver(request_started, dispatch_uid='issues.instrumentation.install_query_counter')
+def install_query_counter(**kwargs):
+    """Wrap this thread's connections with count_query, once each"""
+    for alias in connections:
+        wrappers = connections[alias].execute_wrappers
+        if count_query not in wrappers:
+            wrappers.insert(0, count_query)
+
+
+class ViewStats:
+    def __init__(self):
+        self.requests = {}
+        self.buckets = [0] * (len(DURATION_BUCKETS) + 1)
+        self.duration = 0.0
+        self.queries = 0
+        self.db_duration = 0.0
+        self.over_budget = 0
+
+
+class Metrics:
+    """Thread-safe per-view request, latency and query totals"""
+
+    def __init__(self):
+        self._views = {}
+        self._lock = threading.Lock()
+
+    def record(self, view, method, status, duration, queries, db_duration, over_budget=False):
+        with self._lock:
+            stats = self._views.setdefault(view, ViewStats())
+            key = (method, status)
+            stats.requests[key] = stats.requests.get(key, 0) + 1
+            stats.buckets[bisect_left(DURATION_BUCKETS, duration)] += 1
+            stats.duration += duration
+            stats.queries += queries
+            stats.db_duration += db_duration
+            stats.over_budget += over_budget
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+    def render(self):
+        """The Prometheus text exposition format"""
+        with self._lock:
+            views = sorted(self._views.items())
+            lines = [
+                '# HELP bugtracker_requests_total Requests handled, by view, method and status.',
+                '# TYPE bugtracker_requests_total counter',
+            ]
+            for view, stats in views:
+                for (method, status), count in sorted(stats.requests.items()):
+                    lines.append(
+                        f'bugtracker_requests_total{{view="{escape_label(view)}",method="{method}",'
+                        f'status="{status}"}} {count}'
+                    )
+
+            lines += [
+                '# HELP bugtracker_request_duration_seconds Wall time per request.',
+                '# TYPE bugtracker_request_duration_seconds histogram',
+            ]
+            for view, stats in views:
+                label = f'view="{escape_label(view)}"'
+                cumulative = 0
+                for bound, count in zip(DURATION_BUCKETS + ('+Inf',), stats.buckets):
+                    cumulative += count
+                    lines.append(f'bugtracker_request_duration_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+                lines.append(f'bugtracker_request_duration_seconds_sum{{{label}}} {stats.duration:.6f}')
+                lines.append(f'bugtracker_request_duration_seconds_count{{{label}}} {cumulative}')
+
+            for name, help_text, attr, fmt in (
+                ('bugtracker_db_queries_total', 'Database queries run.', 'queries', '{}'),
+                ('bugtracker_db_query_duration_seconds_total', 'Time spent in database queries.',
+                 'db_duration', '{:.6f}'),
+                ('bugtracker_query_budget_exceeded_total', 'Requests that ran more queries than their budget.',
+                 'over_budget', '{}'),
+            ):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+                for view, stats in views:
+                    lines.append(f'{name}{{view="{escape_label(view)}"}} {fmt.format(getattr(stats, attr))}')
+        return '\n'.join(lines) + '\n'
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+metrics = Metrics()
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNRESOLVED_VIEW
+    return match.url_name or match.view_name or UNRESOLVED_VIEW
+
+
+def server_timing(duration, queries, db_duration):
+    return (
+        f'total;dur={duration * 1000:.1f}, '
+        f'db;dur={db_duration * 1000:.1f};desc="{queries} queries"'
+    )
+
+
+def query_budget(view):
+    return getattr(settings, 'QUERY_BUDGETS', {}).get(view)
+
+
+def report_over_budget(view, queries, budget):
+    message = f'{view} ran {queries} queries, over its budget of {budget}'
+    if getattr(settings, 'QUERY_BUDGET_ACTION', 'log') == 'raise':
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+class PerformanceMiddleware:
+    """
+    Put first in MIDDLEWARE so the timings include the session and auth
+    lookups of the middleware below it. Queries run while a streaming
+    response is iterated happen after this returns and aren't counted.
+
+    Async-capable, so under ASGI the chain below it stays async instead
+    of being adapted to sync and back around it.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        counter = QueryCounter()
+        token = _current_counter.set(counter)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_counter.reset(token)
+        return self.record(request, response, counter, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        counter = QueryCounter()
+        token = _current_counter.set(counter)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_counter.reset(token)
+        return self.record(request, response, counter, time.perf_counter() - start)
+
+    def record(self, request, response, counter, duration):
+        view = view_name(request)
+        budget = query_budget(view)
+        over_budget = budget is not None and counter.count > budget
+        metrics.record(
+            view, request.method, response.status_code, duration, counter.count, counter.duration, over_budget,
+        )
+        if over_budget:
+            report_over_budget(view, counter.count, budget)
+        if getattr(settings, 'SERVER_TIMING', True):
+            response['Server-Timing'] = server_timing(duration, counter.count, counter.duration)
+        return response
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. When METRICS_TOKEN is set the scraper must
+    send it as a bearer token; otherwise only staff users may read it.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        allowed = hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    else:
+        allowed = request.user.is_staff
+    if not allowed:
+        return HttpResponseForbidden('Forbidden\n', content_type='text/plain')
+    return HttpResponse(metrics.render() + profiling.render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,272 @@
+"""
+Background analysis jobs.
+
+Jobs are rows in the AnalysisJob table, so the queue needs no broker:
+paste_code enqueues a job and returns, a thread pool inside the web
+process picks it up after the transaction commits, and the
+`analysis_worker` management command drains whatever is left over
+(e.g. jobs queued by a process that was restarted).
+
+Async views skip the queue: start_analysis_async() runs the same steps
+as a task on the event loop, without blocking it, and the view answers
+before the analysis is done. Either way the job's progress and findings are published to
+issues.events as they come in.
+"""
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import events
+from .ai import analyze_with_ai_structured, analyze_with_ai_structured_shared, merge_findings
+from .models import AnalysisJob
+from .persistence import replace_snippet_issues
+from .profiling import profiling, should_profile
+from .rules import count_lines
+from .utils import analyze_code_budgeted, analyze_code_chunks
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'ANALYSIS_WORKERS', 4),
+                thread_name_prefix='analysis',
+            )
+        return _executor
+
+
+def enqueue_analysis(snippet, use_ai=False):
+    """Queue a snippet for analysis and return the job without waiting for it"""
+    job = AnalysisJob.objects.create(snippet=snippet, use_ai=use_ai)
+    events.publish_progress(snippet.pk, 0, 'queued', reset=True)
+    if getattr(settings, 'ANALYSIS_JOBS_EAGER', False):
+        run_job(job.pk)
+    else:
+        transaction.on_commit(lambda: get_executor().submit(_run_in_thread, job.pk))
+    return job
+
+
+def claim_job(job_id):
+    """
+    Atomically move a queued job to running. Returns the job, or None if
+    another worker got there first.
+    """
+    claimed = AnalysisJob.objects.filter(pk=job_id, status='queued').update(
+        status='running', started_at=timezone.now(), attempts=F('attempts') + 1,
+    )
+    if not claimed:
+        return None
+    return AnalysisJob.objects.select_related('snippet').get(pk=job_id)
+
+
+def claim_next_job():
+    """Claim the oldest queued job, or return None when the queue is empty"""
+    while True:
+        job_id = (
+            AnalysisJob.objects.filter(status='queued')
+            .order_by('created_at', 'id')
+            .values_list('id', flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+        job = claim_job(job_id)
+        if job is not None:
+            return job
+
+
+def run_job(job_id):
+    job = claim_job(job_id)
+    if job is not None:
+        execute_job(job)
+
+
+def analyze_job_code(job):
+    """
+    Run the rule analysis for a job's snippet. With ANALYSIS_SANDBOX on it
+    runs within the time budget and may return partial findings. Sampled
+    jobs also store a per-rule profile of the analysis. Progress and the
+    findings go to the snippet's event subscribers.
+    """
+    snippet = job.snippet
+    rules_done = 50 if job.use_ai else 90
+    events.publish_progress(snippet.pk, 10, 'rules', reset=True)
+    profile = should_profile()
+    total = count_lines(snippet.code)
+
+    def on_chunk(analyzed, findings):
+        events.publish_findings(snippet.pk, findings)
+        events.publish_progress(snippet.pk, 10 + (rules_done - 10) * analyzed // total, 'rules')
+
+    if getattr(settings, 'ANALYSIS_SANDBOX', False):
+        result = analyze_code_budgeted(snippet.code, snippet.language, on_chunk, profile)
+        job.truncated = result.truncated
+        job.analyzed_lines = result.analyzed_lines
+        if result.profile is not None:
+            job.profile = result.profile.as_dict()
+        issues = result.issues
+    elif profile:
+        with profiling() as recorded:
+            issues = analyze_code_chunks(snippet.code, snippet.language, on_chunk)
+        job.profile = recorded.as_dict()
+    else:
+        issues = analyze_code_chunks(snippet.code, snippet.language, on_chunk)
+    if job.analyzed_lines is None:
+        job.analyzed_lines = total
+    events.publish_progress(snippet.pk, rules_done, 'ai' if job.use_ai else 'saving')
+    return issues
+
+
+def merge_ai_result(job, issues, ai_result):
+    """Fold an AI result into the rule findings; returns (issues, error message)"""
+    if 'findings' not in ai_result:
+        return issues, ai_result['error']
+    merged = merge_findings(issues, ai_result['findings'])
+    found = {(issue['line_number'], issue['issue_type']) for issue in issues}
+    events.publish_findings(
+        job.snippet_id, [issue for issue in merged if (issue['line_number'], issue['issue_type']) not in found],
+    )
+    events.publish_progress(job.snippet_id, 90, 'saving')
+    return merged, ''
+
+
+def finish_job(job, issues, error=''):
+    with transaction.atomic():
+        replace_snippet_issues(job.snippet, issues)
+        job.status = 'done'
+        job.error = error
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'profile', 'truncated', 'analyzed_lines', 'finished_at'])
+        transaction.on_commit(lambda: events.publish_done(
+            job.snippet_id, job.status, len(issues), job.error, job.truncated,
+        ))
+
+
+def fail_job(job, error):
+    logger.error('Analysis job %s failed', job.pk, exc_info=error)
+    job.status = 'failed'
+    job.error = str(error)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at'])
+    events.publish_done(job.snippet_id, job.status, error=job.error)
+
+
+def execute_job(job):
+    """
+    Analyze the job's snippet and store the findings. AI findings are
+    merged into the rule findings; if the AI call fails the rule findings
+    are still stored and the job's error says why.
+    """
+    try:
+        issues = analyze_job_code(job)
+        error = ''
+        if job.use_ai:
+            ai_result = analyze_with_ai_structured(job.snippet.code, job.snippet.language)
+            issues, error = merge_ai_result(job, issues, ai_result)
+        finish_job(job, issues, error)
+    except Exception as e:
+        fail_job(job, e)
+
+
+_async_executor = None
+
+
+def get_async_executor():
+    """Threads for the rule analysis of async views; bounds how many run at once"""
+    global _async_executor
+    with _executor_lock:
+        if _async_executor is None:
+            _async_executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'ASYNC_ANALYSIS_THREADS', 8),
+                thread_name_prefix='async-analysis',
+            )
+        return _async_executor
+
+
+# Tasks started by start_analysis_async(); the loop only keeps weak references
+_background_tasks = set()
+
+
+async def start_analysis_async(snippet, use_ai=False):
+    """
+    Analyze a snippet from async code in a background task on the running
+    loop, and return its job as soon as it is created. The rule analysis
+    runs on the bounded executor while the AI request is awaited on the
+    loop, so no thread waits on the network. The task gets a context of its own, so it outlives the request that
+    started it and its queries aren't counted against that request.
+    A task lost with its process leaves the job running until
+    requeue_stale_jobs() hands it to the `analysis_worker` command.
+    """
+    job = await AnalysisJob.objects.acreate(
+        snippet=snippet, use_ai=use_ai, status='running', started_at=timezone.now(), attempts=1,
+    )
+    events.publish_progress(snippet.pk, 0, 'queued', reset=True)
+    task = asyncio.create_task(_run_job_async(job), context=contextvars.Context())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return job
+
+
+async def _run_job_async(job):
+    snippet = job.snippet
+    use_ai = job.use_ai
+    try:
+        loop = asyncio.get_running_loop()
+        rule_analysis = loop.run_in_executor(get_async_executor(), analyze_job_code, job)
+        if use_ai:
+            issues, ai_result = await asyncio.gather(
+                rule_analysis, analyze_with_ai_structured_shared(snippet.code, snippet.language),
+            )
+            issues, error = merge_ai_result(job, issues, ai_result)
+        else:
+            issues, error = await rule_analysis, ''
+        await sync_to_async(finish_job)(job, issues, error)
+    except Exception as e:
+        await sync_to_async(fail_job)(job, e)
+
+
+def _run_in_thread(job_id):
+    try:
+        run_job(job_id)
+    finally:
+        connections.close_all()
+
+
+def requeue_stale_jobs(timeout=None):
+    """Put jobs whose worker died mid-run back on the queue"""
+    if timeout is None:
+        timeout = getattr(settings, 'ANALYSIS_JOB_TIMEOUT', 300)
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    return AnalysisJob.objects.filter(status='running', started_at__lt=cutoff).update(status='queued')
+
+
+def run_worker(poll_interval=1.0, once=False):
+    """Process queued jobs until interrupted (or until the queue is empty with once=True)"""
+    processed = 0
+    while True:
+        close_old_connections()
+        requeue_stale_jobs()
+        job = claim_next_job()
+        if job is None:
+            if once:
+                return processed
+            time.sleep(poll_interval)
+            continue
+        execute_job(job)
+        processed += 1
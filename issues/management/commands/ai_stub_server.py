@@ -0,0 +1,116 @@
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+_NUMBERED_LINE = re.compile(r'^\s*(\d+) \| (.*)$', re.MULTILINE)
+_SUSPICIOUS = ('TODO', 'FIXME', 'password', 'eval(')
+
+
+def _suspicious_lines(prompt):
+    return [
+        (int(number), line) for number, line in _NUMBERED_LINE.findall(prompt)
+        if any(marker in line for marker in _SUSPICIOUS)
+    ]
+
+
+def stub_analysis(prompt, json_mode=False):
+    """A deterministic answer in the format the real prompt asks for"""
+    if json_mode:
+        return json.dumps({'findings': [
+            {
+                'line_number': number,
+                'issue_type': 'Stub',
+                'description': f'Suspicious code: {line.strip()}',
+                'severity': 'low',
+                'suggested_fix': line.strip(),
+            }
+            for number, line in _suspicious_lines(prompt)
+        ]})
+    findings = [
+        f'Line {number}: [Stub] - Suspicious code: {line.strip()} (Severity: low)\n'
+        f'Suggested fix: Review this line\n---'
+        for number, line in _suspicious_lines(prompt)
+    ]
+    return '\n'.join(findings) or 'No issues found.'
+
+
+def make_stub_server(host='127.0.0.1', port=0, latency=0.0, fail_rate=0.0, seed=None, quiet=True):
+    """
+    An OpenAI-compatible /chat/completions server for offline work.
+    Returns the (not yet started) ThreadingHTTPServer; port 0 picks a free one.
+    """
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            if not self.path.endswith('/chat/completions'):
+                return self.reply(404, {'error': {'message': 'Not found'}})
+            if latency:
+                time.sleep(latency)
+            with rng_lock:
+                fail = rng.random() < fail_rate
+            if fail:
+                return self.reply(429, {'error': {'message': 'Rate limited'}}, {'Retry-After': '0'})
+
+            prompt = body.get('messages', [{}])[-1].get('content', '')
+            json_mode = body.get('response_format', {}).get('type') == 'json_object'
+            self.reply(200, {
+                'object': 'chat.completion',
+                'model': body.get('model', 'stub'),
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': stub_analysis(prompt, json_mode)},
+                    'finish_reason': 'stop',
+                }],
+            })
+
+        def reply(self, status, payload, headers=None):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            if not quiet:
+                super().log_message(format, *args)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+class Command(BaseCommand):
+    help = 'Run a local OpenAI-compatible stub for offline AI analysis (set AI_BASE_URL=http://HOST:PORT/v1)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=float, default=0.2, help='Seconds to wait before answering')
+        parser.add_argument('--fail-rate', type=float, default=0.0, help='Fraction of requests answered with 429')
+
+    def handle(self, *args, **options):
+        server = make_stub_server(
+            options['host'], options['port'], options['latency'], options['fail_rate'],
+            quiet=options['verbosity'] < 2,
+        )
+        host, port = server.server_address[:2]
+        self.stdout.write(f'AI stub listening on http://{host}:{port}/v1')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from issues.jobs import run_worker
+
+
+class Command(BaseCommand):
+    help = 'Process queued code analysis jobs from the database queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+
+    def handle(self, *args, **options):
+        processed = run_worker(poll_interval=options['poll_interval'], once=options['once'])
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} job(s)'))
@@ -0,0 +1,61 @@
+import threading
+import time
+import uuid
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+
+from issues.ai import AIClient, OpenAIChatProvider, TokenBucket
+from issues.benchmarks import generate_code
+from issues.management.commands.ai_stub_server import make_stub_server
+
+
+class Command(BaseCommand):
+    help = 'Measure AI client throughput against the local stub (or --url)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--snippets', type=int, default=50)
+        parser.add_argument('--lines', type=int, default=100)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--rate', type=float, default=1000.0, help='Token bucket rate (requests/second)')
+        parser.add_argument('--latency', type=float, default=0.1, help='Stub response latency in seconds')
+        parser.add_argument('--fail-rate', type=float, default=0.0)
+        parser.add_argument('--url', help='Benchmark a running server instead of starting the stub')
+
+    def handle(self, *args, **options):
+        server = None
+        url = options['url']
+        if not url:
+            server = make_stub_server(latency=options['latency'], fail_rate=options['fail_rate'], seed=0)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            url = 'http://%s:%s/v1' % server.server_address[:2]
+
+        # A fresh nonce per run so the response cache can't short-circuit anything
+        nonce = uuid.uuid4().hex
+        items = [
+            (f'# {nonce} {index}\n{generate_code(options["lines"], index)}', 'python')
+            for index in range(options['snippets'])
+        ]
+        client = AIClient(
+            provider=OpenAIChatProvider(base_url=url, api_key=''),
+            max_concurrency=options['concurrency'],
+            rate_limiter=TokenBucket(options['rate'], capacity=options['concurrency']),
+            backoff=0.05,
+            cache_alias='default',
+        )
+
+        async def run():
+            async with client:
+                return await client.analyze_many(items)
+
+        start = time.perf_counter()
+        results = async_to_sync(run)()
+        elapsed = time.perf_counter() - start
+        if server:
+            server.shutdown()
+
+        failed = sum(1 for result in results if 'error' in result)
+        self.stdout.write(
+            f'{len(items)} snippet(s), {client.requests_sent} request(s) in {elapsed:.2f}s: '
+            f'{client.requests_sent / elapsed:.1f} req/s, {failed} failed'
+        )
@@ -0,0 +1,97 @@
+import re
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from issues.benchmarks import generate_code
+from issues.utils import analyze_python_code_basic
+
+
+def legacy_analyze(code):
+    """The pre-registry implementation, kept as the benchmark baseline"""
+    issues = []
+    lines = code.split('\n')
+
+    for i, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+
+        checks = [
+            {
+                'pattern': r'print\s+[^\(]',
+                'type': 'Python 2 Syntax',
+                'description': 'print statement without parentheses (Python 2 style)',
+                'severity': 'medium',
+                'fix': lambda l: re.sub(r'print\s+([^\(].*)', r'print(\1)', l)
+            },
+            {
+                'pattern': r'==\s*None|\!=\s*None',
+                'type': 'None Comparison',
+                'description': 'Use "is" or "is not" for None comparisons (PEP 8)',
+                'severity': 'low',
+                'fix': lambda l: l.replace(' == None', ' is None').replace(' != None', ' is not None')
+            },
+            {
+                'pattern': r'^\s*except:',
+                'type': 'Bare Except Clause',
+                'description': 'Bare except clause - specify exception type',
+                'severity': 'medium',
+                'fix': lambda l: l.replace('except:', 'except Exception:')
+            },
+            {
+                'pattern': r'^class\s+\w+[^\(]:',
+                'type': 'Old-style Class',
+                'description': 'Use new-style classes (inherit from object)',
+                'severity': 'low',
+                'fix': lambda l: l.replace(':', '(object):')
+            }
+        ]
+
+        for check in checks:
+            if re.search(check['pattern'], line):
+                issues.append({
+                    'line_number': i,
+                    'issue_type': check['type'],
+                    'description': check['description'],
+                    'severity': check['severity'],
+                    'suggested_fix': check['fix'](line),
+                    'original_line': line
+                })
+                break
+
+    return issues
+
+
+def best_time(func, code, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(code)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class Command(BaseCommand):
+    help = 'Compare analyzer throughput (lines per second) before and after the compiled rule engine'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, default=50000)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        lines = options['lines']
+        code = generate_code(lines, options['seed'])
+
+        if legacy_analyze(code) != analyze_python_code_basic(code):
+            raise CommandError('Compiled rules disagree with the legacy analyzer')
+
+        before = best_time(legacy_analyze, code, options['repeat'])
+        after = best_time(analyze_python_code_basic, code, options['repeat'])
+
+        self.stdout.write(f'lines analyzed: {lines}')
+        self.stdout.write(f'before: {lines / before:,.0f} lines/s ({before * 1000:.1f} ms)')
+        self.stdout.write(f'after:  {lines / after:,.0f} lines/s ({after * 1000:.1f} ms)')
+        self.stdout.write(self.style.SUCCESS(f'speedup: {before / after:.1f}x'))
@@ -0,0 +1,176 @@
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from issues import benchmarks
+
+# Environment for each mode, on top of DATABASE_URL (see bugtracker/database.py)
+SQLITE_MODES = {
+    'sqlite': {'SQLITE_WAL': '0', 'DATABASE_CONN_MAX_AGE': '0'},
+    'sqlite-wal': {'SQLITE_WAL': '1', 'DATABASE_CONN_MAX_AGE': '0'},
+    'sqlite-wal-persistent': {'SQLITE_WAL': '1', 'DATABASE_CONN_MAX_AGE': '600'},
+}
+POSTGRES_MODES = {
+    'postgres': {'DATABASE_CONN_MAX_AGE': '0'},
+    'postgres-persistent': {'DATABASE_CONN_MAX_AGE': '600'},
+    'postgres-pool': {'DATABASE_POOL': '1'},
+}
+
+PAGES = ('dashboard', 'issue_list', 'project_list', 'my_code_list')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Requests per second for the list and dashboard pages under gunicorn, for each database mode: '
+        'SQLite with and without WAL and persistent connections, and with --postgres-url, PostgreSQL '
+        'per-request, persistent and pooled'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', action='append', dest='modes', choices=[*SQLITE_MODES, *POSTGRES_MODES],
+                            help='Run only this mode (repeatable); default is every available mode')
+        parser.add_argument('--postgres-url',
+                            help='A scratch PostgreSQL database; it is migrated and filled with test data')
+        parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+        parser.add_argument('--threads', type=int, default=8, help='Threads per gunicorn worker')
+        parser.add_argument('--concurrency', type=int, default=16, help='Client threads')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds of load per mode')
+        parser.add_argument('--warmup', type=float, default=2.0, help='Seconds of unmeasured load first')
+        parser.add_argument('--issues', type=int, default=2000)
+        parser.add_argument('--projects', type=int, default=20)
+        parser.add_argument('--output', help='Write the JSON here instead of stdout')
+        # Internal: run in a subprocess to fill the database named by DATABASE_URL
+        parser.add_argument('--seed', action='store_true', help='Fill DATABASE_URL and print a session cookie')
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            return self.seed(options)
+
+        modes = options['modes'] or [*SQLITE_MODES, *(POSTGRES_MODES if options['postgres_url'] else ())]
+        if any(mode in POSTGRES_MODES for mode in modes) and not options['postgres_url']:
+            raise CommandError('The postgres modes need --postgres-url')
+
+        results = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            template = Path(tmp) / 'template.sqlite3'
+            sqlite_cookies = None
+            if any(mode in SQLITE_MODES for mode in modes):
+                sqlite_cookies = self.run_seed(f'sqlite:///{template}', options, tmp)
+            postgres_cookies = None
+            if options['postgres_url'] and any(mode in POSTGRES_MODES for mode in modes):
+                postgres_cookies = self.run_seed(options['postgres_url'], options, tmp)
+
+            for mode in modes:
+                if mode in SQLITE_MODES:
+                    # A fresh copy each time: journal_mode=WAL sticks to the file
+                    database = Path(tmp) / f'{mode}.sqlite3'
+                    shutil.copy(template, database)
+                    env = {'DATABASE_URL': f'sqlite:///{database}', **SQLITE_MODES[mode]}
+                    cookies = sqlite_cookies
+                else:
+                    env = {'DATABASE_URL': options['postgres_url'], **POSTGRES_MODES[mode]}
+                    cookies = postgres_cookies
+                # The workers share a cache; start each mode with an empty one
+                env['DEFAULT_CACHE_DIR'] = str(Path(tmp) / f'{mode}-cache')
+                results[mode] = self.run_mode(mode, env, cookies, options)
+
+        report = {
+            'environment': benchmarks.environment(),
+            'workers': options['workers'],
+            'threads': options['threads'],
+            'concurrency': options['concurrency'],
+            'duration': options['duration'],
+            'modes': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            Path(options['output']).write_text(output + '\n')
+        else:
+            self.stdout.write(output)
+        for mode, result in results.items():
+            self.stderr.write(
+                f'{mode:<24} {result["rps"]:>8.1f} req/s  p50 {result["p50_ms"]:>7.1f} ms  '
+                f'p95 {result["p95_ms"]:>7.1f} ms  errors {result["errors"]}'
+            )
+
+    def subprocess_env(self, overrides):
+        env = {key: value for key, value in os.environ.items() if not key.startswith(('DATABASE_', 'SQLITE_'))}
+        env.update(overrides)
+        return env
+
+    def run_seed(self, url, options, tmp):
+        command = [
+            sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'), 'bench_db', '--seed',
+            '--issues', str(options['issues']), '--projects', str(options['projects']),
+        ]
+        env = self.subprocess_env({
+            'DATABASE_URL': url, 'SQLITE_WAL': '0', 'DATABASE_CONN_MAX_AGE': '0',
+            'DEFAULT_CACHE_DIR': str(Path(tmp) / 'seed-cache'),
+        })
+        done = subprocess.run(command, env=env, capture_output=True, text=True)
+        if done.returncode:
+            raise CommandError(f'Seeding {url} failed:\n{done.stderr}')
+        return json.loads(done.stdout)
+
+    def seed(self, options):
+        call_command('migrate', verbosity=0)
+        size = benchmarks.DatasetSize(
+            users=1, projects=options['projects'], issues=options['issues'], comments=options['issues'],
+        )
+        user = benchmarks.generate_dataset(size)[0]
+        client = Client()
+        client.force_login(user)
+        self.stdout.write(json.dumps({settings.SESSION_COOKIE_NAME: client.cookies[settings.SESSION_COOKIE_NAME].value}))
+
+    def run_mode(self, mode, env, cookies, options):
+        port = free_port()
+        base_url = f'http://127.0.0.1:{port}'
+        server = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn', 'bugtracker.wsgi:application',
+                '--worker-class', 'gthread', '--workers', str(options['workers']),
+                '--threads', str(options['threads']), '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+            ],
+            cwd=settings.BASE_DIR, env=self.subprocess_env(env),
+        )
+        try:
+            self.wait_for(base_url, server)
+            paths = [reverse(name) for name in PAGES]
+            if options['warmup']:
+                benchmarks.run_load(base_url, paths, cookies, options['concurrency'], options['warmup'])
+            self.stderr.write(f'{mode}: {options["concurrency"]} clients for {options["duration"]:g}s')
+            return benchmarks.run_load(base_url, paths, cookies, options['concurrency'], options['duration'])
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    def wait_for(self, base_url, server, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError('gunicorn exited during start-up')
+            try:
+                httpx.get(base_url + '/', timeout=1)
+                return
+            except httpx.HTTPError:
+                time.sleep(0.2)
+        raise CommandError(f'gunicorn did not answer on {base_url} within {timeout}s')
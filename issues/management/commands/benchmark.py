@@ -0,0 +1,102 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from issues import benchmarks
+
+SCENARIOS = ('analyzer', 'views')
+
+
+def benchmark_caches():
+    """
+    settings.CACHES with a key prefix of their own: the benchmark times the
+    configured backends, but the throwaway rows' stats and fragments can't
+    be served to (or overwrite) the real users with the same ids
+    """
+    return {
+        alias: {**config, 'KEY_PREFIX': f'benchmark{config.get("KEY_PREFIX", "")}'}
+        for alias, config in settings.CACHES.items()
+    }
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the analyzers and hot views against a throwaway test database and print JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', choices=SCENARIOS, dest='scenarios',
+                            help='Run only this group (repeatable); default is all')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--users', type=int, default=3)
+        parser.add_argument('--projects', type=int, default=20, help='Projects per user')
+        parser.add_argument('--issues', type=int, default=2000, help='Issues per user')
+        parser.add_argument('--comments', type=int, default=4000, help='Comments per user')
+        parser.add_argument('--snippets', type=int, default=50, help='Snippets per user')
+        parser.add_argument('--snippet-lines', type=int, default=200)
+        parser.add_argument('--sizes', help='Analyzer input sizes as label=lines pairs, e.g. small=50,huge=50000')
+        parser.add_argument('--output', help='Write the JSON here instead of stdout')
+        parser.add_argument('--compare', help='A previous run\'s JSON to compare against')
+        parser.add_argument('--fail-over', type=float,
+                            help='Exit with an error if any median is this many percent slower than --compare')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+        baseline = self.load_baseline(options['compare']) if options['compare'] else None
+        size = benchmarks.DatasetSize(
+            users=options['users'], projects=options['projects'], issues=options['issues'],
+            comments=options['comments'], snippets=options['snippets'], snippet_lines=options['snippet_lines'],
+        )
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(CACHES=benchmark_caches()):
+                report = benchmarks.run_suite(
+                    size, repeat=options['repeat'], seed=options['seed'],
+                    analyze_sizes=self.parse_sizes(options['sizes']),
+                    scenarios=options['scenarios'] or SCENARIOS,
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            Path(options['output']).write_text(output + '\n')
+            self.stderr.write(f'Wrote {len(report["scenarios"])} scenario(s) to {options["output"]}')
+        else:
+            self.stdout.write(output)
+
+        if baseline:
+            self.report_comparison(baseline, report, options['fail_over'])
+
+    def load_baseline(self, path):
+        try:
+            return json.loads(Path(path).read_text())
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Could not read {path}: {e}')
+
+    def parse_sizes(self, value):
+        if not value:
+            return None
+        try:
+            return {label: int(lines) for label, lines in (pair.split('=') for pair in value.split(','))}
+        except ValueError:
+            raise CommandError('--sizes takes label=lines pairs, e.g. small=50,huge=50000')
+
+    def report_comparison(self, baseline, report, fail_over):
+        rows = benchmarks.compare(baseline, report)
+        slower = []
+        for name, before, after, change in rows:
+            line = f'{name:<36} {before:>10.2f} ms {after:>10.2f} ms {change:>+7.1f}%'
+            if fail_over is not None and change > fail_over:
+                slower.append(name)
+                line = self.style.ERROR(line)
+            self.stderr.write(line)
+        if slower:
+            raise CommandError(f'{len(slower)} scenario(s) slower than {fail_over}%: {", ".join(slower)}')
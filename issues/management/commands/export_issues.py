@@ -0,0 +1,31 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from issues.models import Issue
+from issues.transfer import FORMATS, export_issues
+
+
+class Command(BaseCommand):
+    help = 'Stream issues out as CSV or NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Only export issues created by this username')
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--output', '-o', help='File to write; defaults to stdout')
+        parser.add_argument('--chunk-size', type=int)
+
+    def handle(self, *args, **options):
+        issues = Issue.objects.all()
+        if options['user']:
+            try:
+                issues = issues.filter(created_by=User.objects.get(username=options['user']))
+            except User.DoesNotExist:
+                raise CommandError(f'No such user: {options["user"]}')
+
+        chunks = export_issues(issues, options['format'], options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as f:
+                f.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,39 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from issues.transfer import FORMATS, detect_format, import_issues
+
+
+class Command(BaseCommand):
+    help = 'Bulk-import issues for a user from a CSV or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--user', required=True, help='Username that will own the issues')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument('--no-create-projects', action='store_true',
+                            help="Skip rows whose project doesn't exist instead of creating it")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'No such user: {options["user"]}')
+
+        fmt = options['format'] or detect_format(options['path'])
+        with open(options['path'], 'rb') as f:
+            result = import_issues(
+                f, user, fmt,
+                batch_size=options['batch_size'],
+                create_projects=not options['no_create_projects'],
+            )
+
+        for number, error in result.errors:
+            self.stderr.write(f'Row {number}: {error}')
+        if result.failure:
+            self.stderr.write(f'Could not read the rest of the file: {result.failure}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.created} issue(s), created {result.projects_created} project(s), '
+            f'skipped {len(result.errors)} row(s)'
+        ))
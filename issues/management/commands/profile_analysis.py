@@ -0,0 +1,48 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from issues.archives import language_for_path
+from issues.profiling import profiling
+from issues.utils import analyze_code_uncached
+
+
+class Command(BaseCommand):
+    help = 'Analyze source files with per-rule profiling and show which rules cost the most'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Files or directories to analyze')
+        parser.add_argument('--language', help='Analyze everything as this language instead of by extension')
+        parser.add_argument('--json', action='store_true', help='Print the raw breakdown as JSON')
+
+    def handle(self, *args, **options):
+        files = []
+        for path in map(Path, options['paths']):
+            if not path.exists():
+                raise CommandError(f'{path} does not exist')
+            files.extend(sorted(p for p in path.rglob('*') if p.is_file()) if path.is_dir() else [path])
+
+        analyzed = 0
+        with profiling() as profile:
+            for path in files:
+                language = options['language'] or language_for_path(path.name)
+                if language is None:
+                    continue
+                analyze_code_uncached(path.read_text(errors='replace'), language)
+                analyzed += 1
+        breakdown = profile.as_dict()
+
+        if options['json']:
+            self.stdout.write(json.dumps(breakdown, indent=2))
+            return
+        self.stdout.write(f'{analyzed} file(s), {breakdown["lines"]} line(s)')
+        for name, ms in breakdown['phases_ms'].items():
+            self.stdout.write(f'  {name:<12} {ms:>10.2f} ms')
+        self.stdout.write(f'{"rule":<28} {"attempts":>9} {"hits":>7} {"match ms":>10} {"fix ms":>8} {"slowest":>10}')
+        for rule in breakdown['rules']:
+            self.stdout.write(
+                f'{rule["rule"][:28]:<28} {rule["attempts"]:>9} {rule["hits"]:>7} {rule["match_ms"]:>10.2f} '
+                f'{rule["fix_ms"]:>8.2f} {rule["slowest_ms"]:>7.3f} ms'
+                + (f' (line {rule["slowest_line"]})' if rule['slowest_line'] else '')
+            )
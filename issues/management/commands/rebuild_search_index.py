@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from issues import search
+from issues.models import CodeSnippet, Comment, Issue
+
+
+class Command(BaseCommand):
+    help = 'Drop and rebuild the full-text search index for issues, comments and code snippets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        backend = search.get_backend()
+        querysets = [
+            Issue.objects.all(),
+            Comment.objects.select_related('issue'),
+            CodeSnippet.objects.all(),
+        ]
+        with transaction.atomic():
+            backend.clear()
+            for queryset in querysets:
+                count = 0
+                batch = []
+                for instance in queryset.iterator(chunk_size=chunk_size):
+                    batch.append(search.document_for(instance))
+                    if len(batch) >= chunk_size:
+                        backend.index(batch)
+                        count += len(batch)
+                        batch = []
+                backend.index(batch)
+                count += len(batch)
+                self.stdout.write(f'Indexed {count} {queryset.model._meta.verbose_name_plural}')
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt'))
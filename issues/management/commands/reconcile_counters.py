@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from issues import counters
+from issues.models import Project
+from issues.stats import invalidate_dashboard_stats
+
+
+class Command(BaseCommand):
+    help = 'Recount every project\'s issues and fix denormalized counters that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, action='append', dest='projects',
+                            help='Only this project id (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        projects = Project.objects.filter(pk__in=options['projects']) if options['projects'] else None
+        fixed = counters.reconcile(projects, batch_size=options['batch_size'])
+        for project, drift in fixed:
+            invalidate_dashboard_stats(project.created_by_id)
+            changes = ', '.join(f'{name} {stored} -> {actual}' for name, (stored, actual) in drift.items())
+            self.stdout.write(f'Project {project.pk} ({project.name}): {changes}')
+        self.stdout.write(self.style.SUCCESS(f'Fixed {len(fixed)} project(s)'))
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0005_codearchive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='codesnippet',
+            index=models.Index(fields=['created_by', '-created_at', '-id'], name='snippet_owner_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['created_by', '-created_at', '-id'], name='issue_owner_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['created_by', 'status', '-created_at', '-id'], name='issue_owner_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['created_by', 'priority', '-created_at', '-id'], name='issue_owner_priority_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project', '-created_at', '-id'], name='issue_project_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['assigned_to', '-created_at', '-id'], name='issue_assignee_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['created_by', '-created_at', '-id'], name='project_owner_recent_idx'),
+        ),
+    ]
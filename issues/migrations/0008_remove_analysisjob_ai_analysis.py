@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:32
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0007_search_index'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='analysisjob',
+            name='ai_analysis',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0008_remove_analysisjob_ai_analysis'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisjob',
+            name='profile',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0009_analysisjob_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisjob',
+            name='analyzed_lines',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='analysisjob',
+            name='truncated',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:02
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+COUNTER_FILTERS = {
+    'issue_count': Q(),
+    'open_count': Q(status='Open'),
+    'in_progress_count': Q(status='In Progress'),
+    'critical_count': Q(priority='Critical', status__in=('Open', 'In Progress')),
+}
+
+
+def count_issues(apps, schema_editor):
+    Issue = apps.get_model('issues', 'Issue')
+    Project = apps.get_model('issues', 'Project')
+
+    def count(condition):
+        counts = (
+            Issue.objects.filter(condition, project=OuterRef('pk')).order_by()
+            .values('project').annotate(count=Count('id')).values('count')
+        )
+        return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+    Project.objects.update(**{name: count(condition) for name, condition in COUNTER_FILTERS.items()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0010_analysisjob_truncated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='critical_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='in_progress_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='issue_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='open_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_issues, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0011_project_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='codearchive',
+            name='truncated_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 
 class Project(models.Model):
@@ -6,6 +6,18 @@ class Project(models.Model):
     description = models.TextField(blank=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Not bumped by the counter updates below, which bypass save()
+    updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized from the project's issues; see issues/counters.py
+    issue_count = models.PositiveIntegerField(default=0, editable=False)
+    open_count = models.PositiveIntegerField(default=0, editable=False)
+    in_progress_count = models.PositiveIntegerField(default=0, editable=False)
+    critical_count = models.PositiveIntegerField(default=0, editable=False)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_by', '-created_at', '-id'], name='project_owner_recent_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -35,9 +47,25 @@ class Issue(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        # Keyset pagination walks (created_at, id) newest first, optionally
+        # narrowed by one of the issue_list filters.
+        indexes = [
+            models.Index(fields=['created_by', '-created_at', '-id'], name='issue_owner_recent_idx'),
+            models.Index(fields=['created_by', 'status', '-created_at', '-id'], name='issue_owner_status_idx'),
+            models.Index(fields=['created_by', 'priority', '-created_at', '-id'], name='issue_owner_priority_idx'),
+            models.Index(fields=['project', '-created_at', '-id'], name='issue_project_recent_idx'),
+            models.Index(fields=['assigned_to', '-created_at', '-id'], name='issue_assignee_recent_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.title} - {self.project.name}"
 
+    def save(self, *args, **kwargs):
+        # The project counter updates in the save signals commit with the row
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 class Comment(models.Model):
     issue = models.ForeignKey(Issue, on_delete=models.CASCADE, related_name='comments')
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -53,43 +81,19 @@ class Comment(models.Model):
 
 
 
-class CodeSnippet(models.Model):
-    LANGUAGES = [
-        ('python', 'Python'),
-        ('javascript', 'JavaScript'),
-        ('java', 'Java'),
-        ('cpp', 'C++'),
-        ('html', 'HTML/CSS'),
-    ]
-    
+class CodeArchive(models.Model):
+    """A zip/tar upload; each source file in it becomes a CodeSnippet"""
     title = models.CharField(max_length=200)
-    code = models.TextField()
-    language = models.CharField(max_length=20, choices=LANGUAGES, default='python')
-    description = models.TextField(blank=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
-    
-    def __str__(self):
-        return self.title
+    file_count = models.PositiveIntegerField(default=0)
+    skipped_count = models.PositiveIntegerField(default=0)
+    # Files whose analysis hit the time budget or skipped overlong lines
+    truncated_count = models.PositiveIntegerField(default=0)
+    issue_count = models.PositiveIntegerField(default=0)
 
-class CodeIssue(models.Model):
-    SEVERITY_CHOICES = [
-        ('low', 'Low'),
-        ('medium', 'Medium'),
-        ('high', 'High'),
-        ('critical', 'Critical'),
-    ]
-    
-    snippet = models.ForeignKey(CodeSnippet, on_delete=models.CASCADE)
-    line_number = models.IntegerField()
-    issue_type = models.CharField(max_length=100)
-    description = models.TextField()
-    severity = models.CharField(max_length=20, choices=SEVERITY_CHOICES, default='medium')
-    suggested_fix = models.TextField(blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
-    
     def __str__(self):
-        return f"{self.issue_type} - Line {self.line_number}"
+        return self.title
 
 class CodeSnippet(models.Model):
     LANGUAGES = [
@@ -107,6 +111,12 @@ class CodeSnippet(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     analyzed = models.BooleanField(default=False)
+    archive = models.ForeignKey(CodeArchive, on_delete=models.CASCADE, null=True, blank=True, related_name='snippets')
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_by', '-created_at', '-id'], name='snippet_owner_recent_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -128,4 +138,33 @@ class CodeIssue(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
-        return f"{self.issue_type} - Line {self.line_number}"
\ No newline at end of file
+        return f"{self.issue_type} - Line {self.line_number}"
+
+class AnalysisJob(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    snippet = models.ForeignKey(CodeSnippet, on_delete=models.CASCADE, related_name='jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    use_ai = models.BooleanField(default=False)
+    error = models.TextField(blank=True)
+    # Per-rule timing breakdown, for profiled runs (see issues/profiling.py)
+    profile = models.JSONField(null=True, blank=True)
+    # Why a budgeted analysis stopped early ('' if it didn't) and how many
+    # lines its findings cover (see issues/sandbox.py)
+    truncated = models.CharField(max_length=20, blank=True)
+    analyzed_lines = models.PositiveIntegerField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self):
+        return f"Analysis of {self.snippet_id} ({self.status})"
@@ -0,0 +1,111 @@
+import base64
+import binascii
+from datetime import datetime
+from urllib.parse import urlencode
+
+from django.db.models import Q
+
+DEFAULT_PER_PAGE = 25
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(obj):
+    raw = f'{obj.created_at.isoformat()}|{obj.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursor(cursor) from e
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Newest-first pagination on (created_at, id).
+
+    Unlike OFFSET pagination every page is an index range scan, so page
+    1000 costs the same as page 1. Pages are addressed by opaque
+    cursors instead of numbers.
+    """
+
+    def __init__(self, queryset, per_page=DEFAULT_PER_PAGE):
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def page(self, after=None, before=None):
+        if before:
+            created_at, pk = decode_cursor(before)
+            queryset = self.queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)
+            ).order_by('created_at', 'id')
+        else:
+            queryset = self.queryset.order_by('-created_at', '-id')
+            if after:
+                created_at, pk = decode_cursor(after)
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+                )
+
+        # One extra row tells us whether there is another page
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if before:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(after)
+
+        return KeysetPage(
+            rows,
+            next_cursor=encode_cursor(rows[-1]) if rows and has_next else None,
+            previous_cursor=encode_cursor(rows[0]) if rows and has_previous else None,
+        )
+
+
+def paginate(request, queryset, params=None, per_page=DEFAULT_PER_PAGE):
+    """
+    Paginate a queryset from the ?after= / ?before= request parameters.
+    Returns the page plus query strings for the next/previous links that
+    keep the given filter params.
+    """
+    paginator = KeysetPaginator(queryset, per_page)
+    try:
+        page = paginator.page(after=request.GET.get('after'), before=request.GET.get('before'))
+    except InvalidCursor:
+        page = paginator.page()
+
+    params = {key: value for key, value in (params or {}).items() if value}
+    return {
+        'page': page,
+        'next_query': urlencode({**params, 'after': page.next_cursor}) if page.has_next else '',
+        'previous_query': urlencode({**params, 'before': page.previous_cursor}) if page.has_previous else '',
+    }
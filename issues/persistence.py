@@ -0,0 +1,90 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import CodeIssue
+
+# The finding fields stored on CodeIssue; two findings with equal values
+# for all of them are the same row as far as re-analysis is concerned.
+ISSUE_FIELDS = ('line_number', 'issue_type', 'description', 'severity', 'suggested_fix')
+
+
+def _batch_size(batch_size):
+    return batch_size or getattr(settings, 'ANALYSIS_BULK_BATCH_SIZE', 500)
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def issue_key(issue):
+    return tuple(issue[field] for field in ISSUE_FIELDS)
+
+
+def bulk_create_findings(snippet_issues, batch_size=None):
+    """Insert findings for (snippet, issues) pairs with a handful of multi-row INSERTs"""
+    return CodeIssue.objects.bulk_create(
+        [
+            CodeIssue(snippet=snippet, **{field: issue[field] for field in ISSUE_FIELDS})
+            for snippet, issues in snippet_issues
+            for issue in issues
+        ],
+        batch_size=_batch_size(batch_size),
+    )
+
+
+def bulk_create_issues(snippet, issues, batch_size=None):
+    """Insert findings for one snippet"""
+    return bulk_create_findings([(snippet, issues)], batch_size)
+
+
+def delete_findings(pks, batch_size=None):
+    """Delete CodeIssue rows by primary key, a batch per DELETE"""
+    for batch in _batches(pks, _batch_size(batch_size)):
+        CodeIssue.objects.filter(pk__in=batch).delete()
+
+
+def save_snippet_with_issues(snippet, issues, batch_size=None):
+    """Save a new snippet and all of its findings in a single transaction"""
+    with transaction.atomic():
+        snippet.analyzed = True
+        snippet.save()
+        bulk_create_issues(snippet, issues, batch_size)
+    return snippet
+
+
+def replace_snippet_issues(snippet, issues, batch_size=None):
+    """
+    Replace a snippet's findings after re-analysis.
+
+    Rows whose finding is unchanged are left alone; only findings that
+    disappeared are deleted and only new ones inserted.
+    Returns (created, deleted, kept) counts.
+    """
+    batch_size = _batch_size(batch_size)
+    with transaction.atomic():
+        existing = defaultdict(list)
+        rows = CodeIssue.objects.filter(snippet=snippet).values_list('pk', *ISSUE_FIELDS)
+        for pk, *values in rows.iterator(chunk_size=2000):
+            existing[tuple(values)].append(pk)
+
+        to_create = []
+        kept = 0
+        for issue in issues:
+            pks = existing.get(issue_key(issue))
+            if pks:
+                pks.pop()
+                kept += 1
+            else:
+                to_create.append(issue)
+
+        stale = [pk for pks in existing.values() for pk in pks]
+        delete_findings(stale, batch_size)
+        bulk_create_issues(snippet, to_create, batch_size)
+
+        if not snippet.analyzed:
+            snippet.analyzed = True
+            snippet.save(update_fields=['analyzed'])
+    return len(to_create), len(stale), kept
@@ -0,0 +1,159 @@
+"""
+Per-rule profiling for the analyzers.
+
+Inside `with profiling() as profile:` every analysis run records, for
+each rule, how many lines it was tried on, how many it matched, the time
+spent matching (and the slowest single attempt, which is where regex
+backtracking shows up) and the time spent building fixes. The syntax-tree
+analyzer reports its parse and walk phases and per-rule node checks.
+
+Profiled runs try the rules one at a time instead of through the combined
+regex, so they are slower than normal runs; analysis jobs are profiled
+for a random ANALYSIS_PROFILE_SAMPLE_RATE fraction of them (1.0 profiles
+every job, e.g. while tuning a rule). Cached results aren't re-analyzed,
+so their profile is empty.
+"""
+import random
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_current = ContextVar('analysis_profile', default=None)
+
+
+class RuleCounter:
+    __slots__ = ('attempts', 'hits', 'seconds', 'fix_seconds', 'slowest', 'slowest_line')
+
+    def __init__(self):
+        self.attempts = 0
+        self.hits = 0
+        self.seconds = 0.0
+        self.fix_seconds = 0.0
+        self.slowest = 0.0
+        self.slowest_line = None
+
+    def attempt(self, seconds, matched, line_number=None):
+        self.attempts += 1
+        self.hits += matched
+        self.seconds += seconds
+        if seconds > self.slowest:
+            self.slowest = seconds
+            self.slowest_line = line_number
+
+    def merge(self, other):
+        self.attempts += other.attempts
+        self.hits += other.hits
+        self.seconds += other.seconds
+        self.fix_seconds += other.fix_seconds
+        if other.slowest > self.slowest:
+            self.slowest = other.slowest
+            self.slowest_line = other.slowest_line
+
+
+class AnalysisProfile:
+    def __init__(self):
+        self.runs = 0
+        self.lines = 0
+        self.rules = {}
+        self.phases = {}
+
+    def rule(self, rule):
+        counter = self.rules.get(rule)
+        if counter is None:
+            counter = self.rules[rule] = RuleCounter()
+        return counter
+
+    def phase(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def merge(self, other):
+        self.runs += other.runs
+        self.lines += other.lines
+        for rule, counter in other.rules.items():
+            self.rule(rule).merge(counter)
+        for name, seconds in other.phases.items():
+            self.phase(name, seconds)
+
+    def as_dict(self):
+        """JSON-friendly breakdown, most expensive rule first"""
+        rules = sorted(self.rules.items(), key=lambda item: item[1].seconds + item[1].fix_seconds, reverse=True)
+        return {
+            'runs': self.runs,
+            'lines': self.lines,
+            'phases_ms': {name: round(seconds * 1000, 3) for name, seconds in sorted(self.phases.items())},
+            'rules': [
+                {
+                    'rule': rule.issue_type,
+                    'pattern': rule.pattern,
+                    'attempts': counter.attempts,
+                    'hits': counter.hits,
+                    'match_ms': round(counter.seconds * 1000, 3),
+                    'fix_ms': round(counter.fix_seconds * 1000, 3),
+                    'slowest_ms': round(counter.slowest * 1000, 3),
+                    'slowest_line': counter.slowest_line,
+                }
+                for rule, counter in rules
+            ],
+        }
+
+
+@contextmanager
+def profiling(profile=None):
+    """Profile the analysis runs in this block (this thread/task only)"""
+    profile = profile if profile is not None else AnalysisProfile()
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+        record_totals(profile)
+
+
+def current_profile():
+    return _current.get()
+
+
+def should_profile():
+    rate = getattr(settings, 'ANALYSIS_PROFILE_SAMPLE_RATE', 0.0)
+    return rate > 0 and random.random() < rate
+
+
+# Totals over every profiled run in this process, exported with /metrics
+totals = AnalysisProfile()
+_totals_lock = threading.Lock()
+
+
+def record_totals(profile):
+    with _totals_lock:
+        totals.merge(profile)
+
+
+def reset_totals():
+    global totals
+    with _totals_lock:
+        totals = AnalysisProfile()
+
+
+def render_metrics():
+    """Per-rule totals in the Prometheus text format"""
+    from .instrumentation import escape_label
+
+    with _totals_lock:
+        rules = sorted(totals.rules.items(), key=lambda item: (item[0].issue_type, item[0].pattern))
+        lines = []
+        for name, help_text, value in (
+            ('bugtracker_rule_attempts_total', 'Lines a rule was tried on in profiled runs.',
+             lambda counter: counter.attempts),
+            ('bugtracker_rule_hits_total', 'Lines a rule matched in profiled runs.', lambda counter: counter.hits),
+            ('bugtracker_rule_seconds_total', 'Time spent matching a rule in profiled runs.',
+             lambda counter: f'{counter.seconds:.6f}'),
+        ):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+            for rule, counter in rules:
+                lines.append(
+                    f'{name}{{rule="{escape_label(rule.issue_type)}",pattern="{escape_label(rule.pattern)}"}} '
+                    f'{value(counter)}'
+                )
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,71 @@
+"""
+Read-replica routing.
+
+Reads stay on the primary by default, so a page never misses a row the
+same user just wrote. Views that only list data and tolerate a little
+replication lag opt in with @read_from_replica; their reads go to the
+'replica' database when DATABASE_REPLICA_URL configures one.
+
+Even those views read from the primary for REPLICA_PIN_SECONDS after the
+user last wrote something (see pin_to_primary()), so the page a write
+redirects to shows it, and the stats and template fragments the write
+invalidated aren't cached again from a replica that hasn't caught up.
+The pin is kept in the shared default cache, so it holds in every
+worker and for all of the user's sessions.
+"""
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+REPLICA = 'replica'
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and REPLICA in settings.DATABASES:
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both databases hold the same rows
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema from the primary
+        return db != REPLICA
+
+
+def _pin_key(user_id):
+    return f'primary-pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """Keep the user's reads on the primary for REPLICA_PIN_SECONDS"""
+    seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+    if seconds and REPLICA in settings.DATABASES:
+        cache.set(_pin_key(user_id), True, seconds)
+
+
+def pinned_to_primary(user):
+    return user.is_authenticated and cache.get(_pin_key(user.pk), False)
+
+
+def read_from_replica(view):
+    """Route the view's reads to the replica, if there is one and the user isn't pinned"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if REPLICA not in settings.DATABASES or pinned_to_primary(request.user):
+            return view(request, *args, **kwargs)
+        token = _use_replica.set(True)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+    return wrapper
@@ -0,0 +1,340 @@
+import re
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from itertools import islice
+from typing import Callable
+
+from .profiling import current_profile
+
+# Same line breaks the Python tokenizer recognises, so line numbers agree
+# with the syntax tree's node.lineno everywhere.
+_NEWLINE = re.compile(r'\r\n|\r|\n')
+
+
+def split_lines(code):
+    """Split code into lines numbered the way the AST numbers them"""
+    return _NEWLINE.split(code)
+
+
+def count_lines(code):
+    """len(split_lines(code)), without building the list"""
+    return code.count('\n') + code.count('\r') - code.count('\r\n') + 1
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    A single line-level check.
+
+    `keyword` is a literal every match of `pattern` must contain; it lets
+    the rule set skip lines that cannot possibly match without running
+    any regex on them.
+    """
+    pattern: str
+    issue_type: str
+    description: str
+    severity: str
+    fix: Callable[[str], str]
+    keyword: str = ''
+
+    def finding(self, line_number, line):
+        return {
+            'line_number': line_number,
+            'issue_type': self.issue_type,
+            'description': self.description,
+            'severity': self.severity,
+            'suggested_fix': self.fix(line),
+            'original_line': line,
+        }
+
+
+class RuleSet:
+    """
+    Rules compiled once into a combined alternation.
+
+    Only the first matching rule (in declaration order) is reported per
+    line, which is what the original per-line loop did. Lines starting
+    with one of `comment_prefixes` are never reported. With
+    `block_comment` (an opening and closing delimiter) the text of block
+    comments is blanked out before the rules see a line, so code before
+    or after a comment on the same line is still checked. Delimiters
+    inside string literals (opened by one of `quotes`, ending with the
+    line) or line comments don't count.
+
+    Under profiling.profiling() the rules are tried one by one instead,
+    so each gets its own attempt, hit and timing counts.
+    """
+
+    def __init__(self, rules, comment_prefixes=('#',), block_comment=None, quotes=()):
+        self.rules = tuple(rules)
+        self.comment_prefixes = tuple(comment_prefixes)
+        self.block_comment = block_comment
+        if block_comment:
+            opener, closer = (re.escape(delimiter) for delimiter in block_comment)
+            # Strings and line comments first, so a delimiter inside one doesn't count
+            strings = [rf'{q}(?:\\.|[^{q}\\\n])*(?:{q}|$)' for q in map(re.escape, quotes)]
+            line_comments = [re.escape(prefix) + r'[^\n]*' for prefix in self.comment_prefixes
+                             if prefix != block_comment[0]]
+            self._block_regex = re.compile(
+                '|'.join(strings + line_comments + [f'{opener}.*?(?:{closer}|\\Z)']), re.S | re.M,
+            )
+        self._regexes = tuple(re.compile(rule.pattern) for rule in self.rules)
+        self._combined = re.compile('|'.join(
+            f'(?P<r{index}>{rule.pattern})' for index, rule in enumerate(self.rules)
+        ))
+        self._groups = tuple(
+            self._combined.groupindex[f'r{index}'] for index in range(len(self.rules))
+        )
+        if all(rule.keyword for rule in self.rules):
+            keywords = sorted({rule.keyword for rule in self.rules}, key=len, reverse=True)
+            self._prefilter = re.compile('|'.join(re.escape(k) for k in keywords))
+        else:
+            self._prefilter = None
+
+    def match(self, line):
+        """Return the first rule matching a stripped line, or None"""
+        m = self._combined.search(line)
+        if m is None:
+            return None
+        index = next(i for i, group in enumerate(self._groups) if m.start(group) != -1)
+        # The alternation reports the leftmost hit; an earlier rule may
+        # still match further along the line and takes precedence.
+        for earlier in range(index):
+            if self._regexes[earlier].search(line):
+                return self.rules[earlier]
+        return self.rules[index]
+
+    def match_profiled(self, line, profile, line_number=None):
+        """match(), trying each rule separately and recording it in profile"""
+        for rule, regex in zip(self.rules, self._regexes):
+            start = time.perf_counter()
+            matched = regex.search(line) is not None
+            profile.rule(rule).attempt(time.perf_counter() - start, matched, line_number)
+            if matched:
+                return rule
+        return None
+
+    def check_line(self, raw_line, line_number, profile=None):
+        """Return the finding for one raw line, or None"""
+        line = raw_line.strip()
+        if not line or line.startswith(self.comment_prefixes):
+            return None
+        if profile is None:
+            rule = self.match(line)
+            return rule.finding(line_number, line) if rule else None
+
+        rule = self.match_profiled(line, profile, line_number)
+        if rule is None:
+            return None
+        start = time.perf_counter()
+        finding = rule.finding(line_number, line)
+        profile.rule(rule).fix_seconds += time.perf_counter() - start
+        return finding
+
+    def _block_spans(self, text, pos=0):
+        """(start, end) of the block comments in text from pos on"""
+        opener = self.block_comment[0]
+        return [match.span() for match in self._block_regex.finditer(text, pos) if match.group().startswith(opener)]
+
+    @staticmethod
+    def _blank(line, spans):
+        """line with each (start, end) span replaced by a space, as a compiler sees a comment"""
+        pieces, last = [], 0
+        for start, end in spans:
+            pieces += [line[last:start], ' ']
+            last = end
+        pieces.append(line[last:])
+        return ''.join(pieces)
+
+    def _uncomment(self, line, in_block):
+        """(line with its block comments blanked, whether one is still open at its end)"""
+        opener, closer = self.block_comment
+        pos = 0
+        if in_block:
+            pos = line.find(closer)
+            if pos == -1:
+                return '', True
+            pos += len(closer)
+        spans = self._block_spans(line, pos)
+        still_open = False
+        if spans:
+            comment = line[slice(*spans[-1])]
+            still_open = len(comment) < len(opener) + len(closer) or not comment.endswith(closer)
+        if pos:
+            spans.insert(0, (0, pos))
+        return self._blank(line, spans), still_open
+
+    def _numbered(self, lines, start):
+        """(line number, line with its block comments blanked)"""
+        if self.block_comment is None:
+            yield from enumerate(lines, start)
+            return
+        opener = self.block_comment[0]
+        in_block = False
+        for line_number, line in enumerate(lines, start):
+            if in_block or opener in line:
+                line, in_block = self._uncomment(line, in_block)
+            yield line_number, line
+
+    def scan_lines(self, lines, start=1):
+        """
+        Yield findings for an iterable of lines as they are checked, so
+        callers never need the whole buffer in memory.
+        """
+        profile = current_profile()
+        if profile is not None:
+            profile.runs += 1
+        yield from self._check(self._numbered(lines, start), profile)
+
+    def scan_chunks(self, lines, chunk_lines):
+        """
+        scan_lines() a chunk at a time: yields (last line checked, the
+        chunk's findings) every chunk_lines lines, carrying block
+        comments over from one chunk to the next.
+        """
+        profile = current_profile()
+        if profile is not None:
+            profile.runs += 1
+        numbered = self._numbered(lines, 1)
+        while True:
+            chunk = list(islice(numbered, chunk_lines))
+            if not chunk:
+                return
+            yield chunk[-1][0], list(self._check(chunk, profile))
+
+    def _check(self, numbered, profile):
+        """Findings for (line number, line) pairs"""
+        if profile is not None:
+            yield from self._check_profiled(numbered, profile)
+            return
+        prefilter = self._prefilter.search if self._prefilter else None
+        for line_number, line in numbered:
+            if prefilter is not None and prefilter(line) is None:
+                continue
+            finding = self.check_line(line, line_number)
+            if finding:
+                yield finding
+
+    def _check_profiled(self, numbered, profile):
+        prefilter = self._prefilter.search if self._prefilter else None
+        for line_number, line in numbered:
+            profile.lines += 1
+            if prefilter is not None:
+                started = time.perf_counter()
+                skip = prefilter(line) is None
+                profile.phase('prefilter', time.perf_counter() - started)
+                if skip:
+                    continue
+            finding = self.check_line(line, line_number, profile)
+            if finding:
+                yield finding
+
+    def scan(self, code):
+        """
+        Analyze a whole buffer.
+
+        The keyword prefilter runs once over the buffer; only lines it
+        lands on are split out and checked against the rules. Block
+        comments are found with one more pass over the buffer and blanked
+        out of the lines they touch.
+        """
+        profile = current_profile()
+        # The buffer walk below only knows '\n' line breaks
+        if profile is not None or self._prefilter is None or '\r' in code:
+            return list(self.scan_lines(split_lines(code)))
+
+        spans = self._block_spans(code) if self.block_comment else []
+        comment_ends = [end for _, end in spans]
+        issues = []
+        search = self._prefilter.search
+        pos = 0
+        line_start = 0
+        line_number = 1
+        while True:
+            m = search(code, pos)
+            if m is None:
+                break
+            start = code.rfind('\n', 0, m.start()) + 1
+            end = code.find('\n', m.end())
+            if end == -1:
+                end = len(code)
+            line_number += code.count('\n', line_start, start)
+            line_start = start
+            pos = end + 1
+            line = code[start:end]
+            # The comments ending after this line starts, up to the first starting after it ends
+            touching = []
+            comment = bisect_right(comment_ends, start)
+            while comment < len(spans) and spans[comment][0] < end:
+                comment_start, comment_end = spans[comment]
+                touching.append((max(comment_start, start) - start, min(comment_end, end) - start))
+                comment += 1
+            if touching:
+                line = self._blank(line, touching)
+            finding = self.check_line(line, line_number)
+            if finding:
+                issues.append(finding)
+        return issues
+
+
+_PRINT_ARGS = re.compile(r'print\s+([^\(].*)')
+
+
+def _fix_print(line):
+    return _PRINT_ARGS.sub(r'print(\1)', line)
+
+
+def _fix_none_comparison(line):
+    return line.replace(' == None', ' is None').replace(' != None', ' is not None')
+
+
+def _fix_bare_except(line):
+    return line.replace('except:', 'except Exception:')
+
+
+def _fix_old_style_class(line):
+    return line.replace(':', '(object):')
+
+
+# Python 2 print syntax
+PRINT_STATEMENT = Rule(
+    pattern=r'print\s+[^\(]',
+    issue_type='Python 2 Syntax',
+    description='print statement without parentheses (Python 2 style)',
+    severity='medium',
+    fix=_fix_print,
+    keyword='print',
+)
+
+# None comparison
+NONE_COMPARISON = Rule(
+    pattern=r'==\s*None|\!=\s*None',
+    issue_type='None Comparison',
+    description='Use "is" or "is not" for None comparisons (PEP 8)',
+    severity='low',
+    fix=_fix_none_comparison,
+    keyword='None',
+)
+
+# Bare except
+BARE_EXCEPT = Rule(
+    pattern=r'^\s*except:',
+    issue_type='Bare Except Clause',
+    description='Bare except clause - specify exception type',
+    severity='medium',
+    fix=_fix_bare_except,
+    keyword='except:',
+)
+
+# Old style class
+OLD_STYLE_CLASS = Rule(
+    pattern=r'^class\s+\w+[^\(]:',
+    issue_type='Old-style Class',
+    description='Use new-style classes (inherit from object)',
+    severity='low',
+    fix=_fix_old_style_class,
+    keyword='class',
+)
+
+PYTHON_RULES = RuleSet([PRINT_STATEMENT, NONE_COMPARISON, BARE_EXCEPT, OLD_STYLE_CLASS])
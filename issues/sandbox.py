@@ -0,0 +1,321 @@
+"""
+Time-budgeted analysis for hostile or enormous input.
+
+analyze_budgeted() runs an analyzer in a separate worker process with:
+
+- a line-length limit: lines longer than ANALYSIS_MAX_LINE_LENGTH are
+  blanked out (keeping line numbers) before any regex sees them
+- a CPU limit: RLIMIT_CPU stops the worker after ANALYSIS_CPU_BUDGET
+  seconds of CPU for one snippet (POSIX only)
+- a wall-clock limit: the worker is killed after ANALYSIS_TIME_BUDGET
+  seconds
+
+The worker runs the analyzer a chunk at a time (analyze_chunks(): line
+ranges for the rule scan, groups of top-level statements for Python's
+syntax tree) and sends each chunk's findings back as it finishes, so a
+snippet that runs out of budget still returns the findings for the lines
+it got through, marked as truncated, and they are the findings a
+complete run would have reported for those lines. Workers are spawned
+once and reused; a killed worker is replaced on the next call. Profiled
+runs send their profile back along with the findings.
+
+Where a worker process isn't an option, analyze_with_deadline() applies
+the line-length limit and the time budget in-process, checking the
+deadline between chunks; LineGuard does the same for streaming
+analysis.
+"""
+import logging
+import math
+import multiprocessing
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+
+import django
+from django.conf import settings
+
+from .rules import count_lines, split_lines
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+TRUNCATED_TIMEOUT = 'timeout'
+TRUNCATED_CPU = 'cpu'
+TRUNCATED_LINE_LENGTH = 'line_length'
+
+
+class SandboxError(Exception):
+    pass
+
+
+@dataclass
+class BudgetedResult:
+    issues: list
+    # Why the findings are incomplete ('' if they aren't)
+    truncated: str = ''
+    # Findings are complete for lines 1..analyzed_lines
+    analyzed_lines: int = 0
+    skipped_lines: list = field(default_factory=list)
+    # The AnalysisProfile of a profiled run that completed
+    profile: object = None
+
+
+def clip_long_lines(code, max_length=None):
+    """Blank out lines longer than max_length; returns (code, skipped line numbers)"""
+    max_length = max_length or getattr(settings, 'ANALYSIS_MAX_LINE_LENGTH', 2000)
+    lines = split_lines(code)
+    skipped = [number for number, line in enumerate(lines, 1) if len(line) > max_length]
+    if not skipped:
+        return code, skipped
+    for number in skipped:
+        lines[number - 1] = ''
+    return '\n'.join(lines), skipped
+
+
+def _limit_cpu(seconds):
+    """Let this process use `seconds` more CPU time before SIGXCPU stops it"""
+    if resource is None or not seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = math.ceil(usage.ru_utime + usage.ru_stime + seconds)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _analyze_in_chunks(conn, code, language, chunk_lines, profile):
+    from .analyzers import get_analyzer
+    from .profiling import profiling
+
+    analyzer = get_analyzer(language)
+    with profiling() if profile else nullcontext() as recorded:
+        if analyzer is not None:
+            for analyzed, findings in analyzer.analyze_chunks(code, chunk_lines):
+                conn.send(('partial', analyzed, findings))
+    conn.send(('done', recorded))
+
+
+def _worker_main(conn):
+    django.setup()
+    conn.send(('ready',))
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        code, language, cpu_seconds, chunk_lines, profile = task
+        _limit_cpu(cpu_seconds)
+        try:
+            _analyze_in_chunks(conn, code, language, chunk_lines, profile)
+        except Exception as e:
+            conn.send(('error', f'{type(e).__name__}: {e}'))
+
+
+class Worker:
+    startup_timeout = 30
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        # Wait for Django to load so start-up doesn't eat the first budget
+        try:
+            ready = self.conn.poll(self.startup_timeout) and self.conn.recv() == ('ready',)
+        except (EOFError, OSError):
+            ready = False
+        if not ready:
+            self.kill()
+            raise SandboxError('Analysis worker failed to start')
+
+    @property
+    def alive(self):
+        return self.process.is_alive()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.kill()
+
+    def analyze(self, code, language, time_budget, cpu_budget, chunk_lines, on_progress=None, profile=False):
+        """Run one analysis; returns (issues, truncated, analyzed_lines, profile)"""
+        deadline = time.monotonic() + time_budget
+        self.conn.send((code, language, cpu_budget, chunk_lines, profile))
+        issues, analyzed = [], 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self.conn.poll(remaining):
+                self.kill()
+                return issues, TRUNCATED_TIMEOUT, analyzed, None
+            try:
+                kind, *payload = self.conn.recv()
+            except (EOFError, OSError):
+                # The CPU limit (or something worse) ended the worker
+                self.kill()
+                return issues, TRUNCATED_CPU, analyzed, None
+            if kind == 'partial':
+                analyzed, findings = payload
+                issues.extend(findings)
+                if on_progress is not None:
+                    on_progress(analyzed, findings)
+            elif kind == 'done':
+                return issues, '', analyzed, payload[0]
+            else:
+                raise SandboxError(payload[0])
+
+
+class WorkerPool:
+    """Reusable spawned workers, at most `size` at a time"""
+
+    def __init__(self, size):
+        self.context = multiprocessing.get_context('spawn')
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def acquire(self):
+        self._slots.acquire()
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.alive:
+                    return worker
+        try:
+            return Worker(self.context)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, worker):
+        if worker.alive:
+            with self._lock:
+                self._idle.append(worker)
+        self._slots.release()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool(getattr(settings, 'ANALYSIS_SANDBOX_WORKERS', 2))
+        return _pool
+
+
+def _finish(code, issues, truncated, analyzed, skipped, profile=None):
+    lines = count_lines(code)
+    if truncated:
+        logger.warning('Analysis of %d lines stopped after line %d (%s)', lines, analyzed, truncated)
+    else:
+        analyzed = lines
+        if skipped:
+            truncated = TRUNCATED_LINE_LENGTH
+    return BudgetedResult(issues, truncated, analyzed, skipped, profile)
+
+
+def analyze_budgeted(code, language='python', time_budget=None, cpu_budget=None, pool=None, on_progress=None,
+                     profile=False):
+    """
+    Analyze in a worker process within the configured budgets; returns a
+    BudgetedResult. on_progress(analyzed_lines, findings) is called with
+    each chunk's findings as it arrives.
+    With profile=True a complete run also returns its AnalysisProfile,
+    which is added to this process's totals.
+    """
+    from .profiling import record_totals
+
+    time_budget = time_budget or getattr(settings, 'ANALYSIS_TIME_BUDGET', 10)
+    cpu_budget = cpu_budget or getattr(settings, 'ANALYSIS_CPU_BUDGET', 5)
+    chunk_lines = getattr(settings, 'ANALYSIS_BUDGET_CHUNK_LINES', 1000)
+    code, skipped = clip_long_lines(code)
+
+    pool = pool or get_worker_pool()
+    worker = pool.acquire()
+    try:
+        issues, truncated, analyzed, recorded = worker.analyze(
+            code, language, time_budget, cpu_budget, chunk_lines, on_progress, profile,
+        )
+    finally:
+        pool.release(worker)
+    if recorded is not None:
+        record_totals(recorded)
+    return _finish(code, issues, truncated, analyzed, skipped, recorded)
+
+
+def analyze_with_deadline(code, language='python', time_budget=None):
+    """
+    analyze_budgeted() in this process, for callers that can't hand the
+    work to a sandbox worker (archive pool workers, edits answered within
+    the request). Lines are clipped the same way and the analysis stops
+    at the first chunk boundary past the time budget; a chunk can't be
+    interrupted, so there is no CPU limit.
+    """
+    from .analyzers import get_analyzer
+
+    deadline = time.monotonic() + (time_budget or getattr(settings, 'ANALYSIS_TIME_BUDGET', 10))
+    chunk_lines = getattr(settings, 'ANALYSIS_BUDGET_CHUNK_LINES', 1000)
+    code, skipped = clip_long_lines(code)
+    analyzer = get_analyzer(language)
+    lines = count_lines(code)
+    issues, truncated, analyzed = [], '', 0
+    if analyzer is not None:
+        for analyzed, findings in analyzer.analyze_chunks(code, chunk_lines):
+            issues.extend(findings)
+            if analyzed < lines and time.monotonic() > deadline:
+                truncated = TRUNCATED_TIMEOUT
+                break
+    return _finish(code, issues, truncated, analyzed, skipped)
+
+
+class LineGuard:
+    """
+    Wraps a line iterator for in-process analysis: blanks lines over the
+    length limit and stops at the deadline. `truncated` says why it stopped
+    early, if it did.
+    """
+
+    def __init__(self, lines, max_length=None, time_budget=None, deadline=None):
+        self.lines = lines
+        self.max_length = max_length or getattr(settings, 'ANALYSIS_MAX_LINE_LENGTH', 2000)
+        if deadline is None:
+            deadline = time.monotonic() + (time_budget or getattr(settings, 'ANALYSIS_TIME_BUDGET', 10))
+        self.deadline = deadline
+        self.truncated = ''
+        self.line_count = 0
+
+    def __iter__(self):
+        for line in self.lines:
+            if time.monotonic() > self.deadline:
+                self.truncated = TRUNCATED_TIMEOUT
+                return
+            self.line_count += 1
+            if len(line) > self.max_length:
+                self.truncated = self.truncated or TRUNCATED_LINE_LENGTH
+                line = ''
+            yield line
@@ -0,0 +1,260 @@
+"""
+Full-text search over issues, comments and code snippets.
+
+Documents live in an inverted index owned by the search backend: an
+FTS5 virtual table on SQLite, or a table with a GIN-indexed tsvector on
+PostgreSQL. Model signals keep it up to date one row at a time, and
+`manage.py rebuild_search_index` recreates it from scratch.
+"""
+import re
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+
+# Highlight markers; they can't appear in escaped text so we can turn
+# them into <mark> tags after escaping the snippet.
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+
+KINDS = {'issue': 1, 'comment': 2, 'snippet': 3}
+KIND_NAMES = {code: name for name, code in KINDS.items()}
+MODEL_KINDS = {'issues.issue': 'issue', 'issues.comment': 'comment', 'issues.codesnippet': 'snippet'}
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+@dataclass
+class SearchDocument:
+    kind: str
+    object_id: int
+    owner_id: int
+    title: str
+    body: str
+
+
+@dataclass
+class SearchHit:
+    kind: str
+    object_id: int
+    title: str
+    snippet: str
+    rank: float
+
+    @property
+    def snippet_html(self):
+        return mark_safe(
+            escape(self.snippet).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>')
+        )
+
+
+def document_for(instance):
+    """Build the search document for an Issue, Comment or CodeSnippet"""
+    from .models import CodeSnippet, Comment, Issue
+
+    if isinstance(instance, Issue):
+        return SearchDocument('issue', instance.pk, instance.created_by_id, instance.title, instance.description)
+    if isinstance(instance, Comment):
+        issue = instance.issue
+        return SearchDocument('comment', instance.pk, issue.created_by_id, issue.title, instance.text)
+    if isinstance(instance, CodeSnippet):
+        body = f'{instance.description}\n{instance.code}' if instance.description else instance.code
+        return SearchDocument('snippet', instance.pk, instance.created_by_id, instance.title, body)
+    raise TypeError(f'{type(instance).__name__} is not searchable')
+
+
+class BaseSearchBackend:
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def create_schema(self, cursor):
+        raise NotImplementedError
+
+    def drop_schema(self, cursor):
+        raise NotImplementedError
+
+    def index(self, documents):
+        raise NotImplementedError
+
+    def remove(self, kind, object_ids):
+        raise NotImplementedError
+
+    def search(self, owner_id, query, limit=20, offset=0):
+        raise NotImplementedError
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            self.drop_schema(cursor)
+            self.create_schema(cursor)
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """FTS5 virtual table ranked with bm25(); titles weigh 10x the body"""
+
+    table = 'issues_search_fts'
+
+    @staticmethod
+    def _rowid(kind, object_id):
+        # Unique per (kind, object) so updates are a rowid lookup, not a scan
+        return object_id * 4 + KINDS[kind]
+
+    @staticmethod
+    def match_expression(query):
+        tokens = _TOKEN.findall(query)
+        if not tokens:
+            return None
+        # Quote every term so user input can't inject FTS5 syntax; the
+        # last one is a prefix match for search-as-you-type.
+        terms = [f'"{token}"' for token in tokens]
+        terms[-1] += '*'
+        return ' '.join(terms)
+
+    def create_schema(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+            "title, body, kind UNINDEXED, object_id UNINDEXED, owner_id UNINDEXED, "
+            "tokenize = 'porter unicode61')"
+        )
+
+    def drop_schema(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def index(self, documents):
+        rows = [
+            (self._rowid(doc.kind, doc.object_id), doc.title, doc.body, KINDS[doc.kind], doc.object_id, doc.owner_id)
+            for doc in documents
+        ]
+        if not rows:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {self.table} (rowid, title, body, kind, object_id, owner_id) '
+                'VALUES (%s, %s, %s, %s, %s, %s)',
+                rows,
+            )
+
+    def remove(self, kind, object_ids):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.table} WHERE rowid = %s',
+                [(self._rowid(kind, object_id),) for object_id in object_ids],
+            )
+
+    def search(self, owner_id, query, limit=20, offset=0):
+        expression = self.match_expression(query)
+        if expression is None:
+            return []
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT kind, object_id, title, "
+                f"snippet({self.table}, 1, %s, %s, '...', 16), bm25({self.table}, 10.0, 1.0) AS rank "
+                f"FROM {self.table} WHERE {self.table} MATCH %s AND owner_id = %s "
+                "ORDER BY rank LIMIT %s OFFSET %s",
+                [HIGHLIGHT_START, HIGHLIGHT_END, expression, owner_id, limit, offset],
+            )
+            return [
+                SearchHit(KIND_NAMES[kind], object_id, title, snippet, -rank)
+                for kind, object_id, title, snippet, rank in cursor.fetchall()
+            ]
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """Weighted tsvector column with a GIN index, ranked with ts_rank()"""
+
+    table = 'issues_search_document'
+    config = 'english'
+
+    def create_schema(self, cursor):
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "kind smallint NOT NULL, object_id bigint NOT NULL, owner_id bigint NOT NULL, "
+            "title text NOT NULL, body text NOT NULL, "
+            "document tsvector GENERATED ALWAYS AS ("
+            f"setweight(to_tsvector('{self.config}', title), 'A') || "
+            f"setweight(to_tsvector('{self.config}', body), 'B')) STORED, "
+            "PRIMARY KEY (kind, object_id))"
+        )
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {self.table}_gin ON {self.table} USING GIN (document)')
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {self.table}_owner ON {self.table} (owner_id)')
+
+    def drop_schema(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def index(self, documents):
+        rows = [(KINDS[doc.kind], doc.object_id, doc.owner_id, doc.title, doc.body) for doc in documents]
+        if not rows:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {self.table} (kind, object_id, owner_id, title, body) '
+                'VALUES (%s, %s, %s, %s, %s) '
+                'ON CONFLICT (kind, object_id) DO UPDATE SET '
+                'owner_id = EXCLUDED.owner_id, title = EXCLUDED.title, body = EXCLUDED.body',
+                rows,
+            )
+
+    def remove(self, kind, object_ids):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE kind = %s AND object_id = ANY(%s)',
+                [KINDS[kind], list(object_ids)],
+            )
+
+    def search(self, owner_id, query, limit=20, offset=0):
+        if not query.strip():
+            return []
+        options = f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxWords=30, MinWords=10'
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT kind, object_id, title, ts_headline('{self.config}', body, q, %s), "
+                "ts_rank(document, q) AS rank "
+                f"FROM {self.table}, websearch_to_tsquery('{self.config}', %s) q "
+                "WHERE owner_id = %s AND document @@ q "
+                "ORDER BY rank DESC LIMIT %s OFFSET %s",
+                [options, query, owner_id, limit, offset],
+            )
+            return [
+                SearchHit(KIND_NAMES[kind], object_id, title, snippet, rank)
+                for kind, object_id, title, snippet, rank in cursor.fetchall()
+            ]
+
+
+VENDOR_BACKENDS = {
+    'sqlite': SQLiteFTSBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend(using=DEFAULT_DB_ALIAS):
+    """
+    The search backend for a database: SEARCH_BACKEND (a dotted path) if
+    set, otherwise the built-in backend for the database vendor.
+    """
+    path = getattr(settings, 'SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)(using)
+    vendor = connections[using].vendor
+    if vendor not in VENDOR_BACKENDS:
+        raise ImproperlyConfigured(f'No search backend for the {vendor} database; set SEARCH_BACKEND')
+    return VENDOR_BACKENDS[vendor](using)
+
+
+def index_objects(instances):
+    """Add or refresh search documents for model instances"""
+    get_backend().index([document_for(instance) for instance in instances])
+
+
+def remove_object(instance):
+    get_backend().remove(MODEL_KINDS[instance._meta.label_lower], [instance.pk])
+
+
+def search(user, query, limit=20, offset=0):
+    return get_backend().search(user.pk, query, limit=limit, offset=offset)
@@ -0,0 +1,78 @@
+from rest_framework import serializers
+
+from .models import CodeIssue, CodeSnippet, Comment, Issue, Project
+
+
+def requested_fields(request):
+    """The ?fields=a,b,c sparse fieldset as a set, or None for all fields"""
+    value = request.query_params.get('fields') if request is not None else None
+    if not value:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """Drop every field not named in the request's ?fields= parameter"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = requested_fields(self.context.get('request'))
+        if fields is None:
+            return
+        unknown = fields - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError({'fields': f'Unknown fields: {", ".join(sorted(unknown))}'})
+        for name in set(self.fields) - fields:
+            self.fields.pop(name)
+
+
+class ProjectSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Project
+        fields = [
+            'id', 'name', 'description', 'created_at',
+            'issue_count', 'open_count', 'in_progress_count', 'critical_count',
+        ]
+
+
+class IssueSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    project_name = serializers.CharField(source='project.name')
+    created_by = serializers.CharField(source='created_by.username')
+    assigned_to = serializers.CharField(source='assigned_to.username', default=None)
+
+    class Meta:
+        model = Issue
+        fields = [
+            'id', 'title', 'description', 'project', 'project_name', 'priority', 'status',
+            'assigned_to', 'created_by', 'created_at', 'updated_at',
+        ]
+
+
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    user = serializers.CharField(source='user.username')
+
+    class Meta:
+        model = Comment
+        fields = ['id', 'issue', 'user', 'text', 'created_at']
+
+
+class CodeIssueSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = CodeIssue
+        fields = ['id', 'snippet', 'line_number', 'issue_type', 'description', 'severity', 'suggested_fix']
+
+
+class FindingSerializer(serializers.ModelSerializer):
+    """A CodeIssue nested inside its snippet"""
+
+    class Meta:
+        model = CodeIssue
+        fields = ['id', 'line_number', 'issue_type', 'description', 'severity', 'suggested_fix']
+
+
+class CodeSnippetSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    issues = FindingSerializer(source='codeissue_set', many=True)
+
+    class Meta:
+        model = CodeSnippet
+        fields = ['id', 'title', 'language', 'description', 'code', 'analyzed', 'archive', 'created_at', 'issues']
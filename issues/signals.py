@@ -0,0 +1,60 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import counters, search
+from .models import CodeSnippet, Comment, Issue, Project
+from .replicas import pin_to_primary
+from .stats import invalidate_dashboard_stats
+
+
+@receiver([post_save, post_delete], sender=Issue)
+@receiver([post_save, post_delete], sender=Project)
+def invalidate_owner_stats(sender, instance, **kwargs):
+    invalidate_dashboard_stats(instance.created_by_id)
+
+
+@receiver([post_save, post_delete], sender=Issue)
+@receiver([post_save, post_delete], sender=Project)
+@receiver([post_save, post_delete], sender=Comment)
+@receiver([post_save, post_delete], sender=CodeSnippet)
+def pin_writer_to_primary(sender, instance, raw=False, **kwargs):
+    if not raw:
+        pin_to_primary(instance.user_id if sender is Comment else instance.created_by_id)
+
+
+@receiver(post_save, sender=Issue)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=CodeSnippet)
+def update_search_index(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_objects([instance])
+
+
+@receiver(post_delete, sender=Issue)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=CodeSnippet)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.remove_object(instance)
+
+
+@receiver(pre_save, sender=Issue)
+def lock_counted_state(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not {'project', 'status', 'priority'} & set(update_fields)):
+        instance._counted_state = counters.issue_state(instance)
+    else:
+        instance._counted_state = counters.stored_state(instance)
+
+
+@receiver(post_save, sender=Issue)
+def update_project_counters(sender, instance, raw=False, **kwargs):
+    if not raw:
+        counters.issue_saved(instance, instance._counted_state)
+
+
+@receiver(post_delete, sender=Issue)
+def decrement_project_counters(sender, instance, origin=None, **kwargs):
+    # Deleting a project takes its issues along; its counters go with it
+    if isinstance(origin, Project) or (isinstance(origin, QuerySet) and origin.model is Project):
+        return
+    counters.issue_deleted(instance)
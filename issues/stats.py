@@ -0,0 +1,60 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
+
+from .models import Project
+
+DASHBOARD_STATS_TIMEOUT = 60 * 10
+
+
+def _stats_key(user_id):
+    return f'dashboard-stats:{user_id}'
+
+
+def _content_version_key(user_id):
+    return f'content-version:{user_id}'
+
+
+def compute_dashboard_stats(user):
+    """Project and issue totals for a user, summed from the project counters"""
+    return Project.objects.filter(created_by=user).aggregate(
+        total_projects=Count('id'),
+        total_issues=Coalesce(Sum('issue_count'), 0),
+        open_issues=Coalesce(Sum('open_count'), 0),
+    )
+
+
+def get_dashboard_stats(user):
+    """Cached dashboard stats; invalidated by the Issue/Project signals"""
+    return cache.get_or_set(
+        _stats_key(user.pk), lambda: compute_dashboard_stats(user), DASHBOARD_STATS_TIMEOUT,
+    )
+
+
+def get_content_version(user):
+    """
+    When the user's issues or projects last changed, as far as the cache
+    knows. Template fragments built from them use it in their cache key,
+    so it lives in the default cache, which every worker shares: a version
+    kept per process would leave the other workers serving their old
+    fragments.
+    """
+    return cache.get_or_set(_content_version_key(user.pk), time.time_ns, DASHBOARD_STATS_TIMEOUT)
+
+
+def _invalidate(user_id):
+    cache.delete(_stats_key(user_id))
+    cache.set(_content_version_key(user_id), time.time_ns(), DASHBOARD_STATS_TIMEOUT)
+
+
+def invalidate_dashboard_stats(user_id):
+    """
+    Drop the user's cached stats and retire their cached fragments. Done
+    again when the write commits: a request that ran in between still
+    read the old rows, and cached them under the new version.
+    """
+    _invalidate(user_id)
+    transaction.on_commit(lambda: _invalidate(user_id))
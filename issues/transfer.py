@@ -0,0 +1,234 @@
+"""
+Bulk issue import and export as CSV or NDJSON.
+
+Imports are parsed as a stream and written in fixed-size batches: each
+batch resolves its project names and usernames with one query apiece
+(remembering what earlier batches found) and inserts its issues with a
+single bulk_create inside its own transaction. A file that turns out to
+be unreadable partway through keeps the batches before the bad spot;
+the result says where reading stopped. Exports walk the table
+with a server-side iterator, so memory use doesn't grow with row count.
+"""
+import codecs
+import csv
+import json
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from . import search
+from .counters import count_created
+from .models import Issue, Project
+from .replicas import pin_to_primary
+from .stats import invalidate_dashboard_stats
+
+FORMATS = ('csv', 'ndjson')
+
+EXPORT_FIELDS = (
+    'id', 'title', 'description', 'project', 'priority', 'status',
+    'assigned_to', 'created_by', 'created_at', 'updated_at',
+)
+_EXPORT_COLUMNS = (
+    'id', 'title', 'description', 'project__name', 'priority', 'status',
+    'assigned_to__username', 'created_by__username', 'created_at', 'updated_at',
+)
+
+_PRIORITIES = {value.lower(): value for value, _ in Issue.PRIORITY_CHOICES}
+_STATUSES = {value.lower(): value for value, _ in Issue.STATUS_CHOICES}
+_TITLE_LENGTH = Issue._meta.get_field('title').max_length
+_PROJECT_NAME_LENGTH = Project._meta.get_field('name').max_length
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    projects_created: int = 0
+    errors: list = field(default_factory=list)  # (row number, message)
+    # Why the rest of the file couldn't be read, if it couldn't; `created`
+    # counts what was imported before that
+    failure: str = ''
+
+
+def detect_format(filename, default='csv'):
+    name = (filename or '').lower()
+    if name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    if name.endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def iter_rows(fileobj, fmt):
+    """
+    Yield (row number, dict) for each record of a binary CSV or NDJSON
+    stream. NDJSON lines that aren't a JSON object yield None.
+    """
+    if fmt not in FORMATS:
+        raise ImportFormatError(f'Unsupported format: {fmt}')
+    lines = codecs.iterdecode(fileobj, 'utf-8-sig')
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield number, row if isinstance(row, dict) else None
+
+
+def _value(row, key):
+    value = row.get(key)
+    return '' if value is None else str(value).strip()
+
+
+def _project_name(row):
+    # Names are cut to fit on create, so look them up cut the same way
+    return _value(row, 'project')[:_PROJECT_NAME_LENGTH]
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class IssueImporter:
+    def __init__(self, user, batch_size=None, create_projects=True):
+        self.user = user
+        self.batch_size = batch_size or getattr(settings, 'ISSUE_IMPORT_BATCH_SIZE', 1000)
+        self.create_projects = create_projects
+        self.projects = {}  # name -> id
+        self.users = {}  # username -> id, or None if there is no such user
+        self.result = ImportResult()
+
+    def run(self, rows):
+        try:
+            for batch in _chunks(rows, self.batch_size):
+                self.import_batch(batch)
+        except (UnicodeDecodeError, csv.Error) as e:
+            self.result.failure = str(e)
+        # bulk_create skips the signals that normally keep these current
+        invalidate_dashboard_stats(self.user.pk)
+        pin_to_primary(self.user.pk)
+        return self.result
+
+    def resolve(self, batch):
+        """Look up the batch's unseen project names and usernames, one query each"""
+        rows = [row for _, row in batch if row]
+        names = {_project_name(row) for row in rows} - self.projects.keys() - {''}
+        if names:
+            # Lowest id wins when a user has several projects with the same name
+            found = (
+                Project.objects.filter(created_by=self.user, name__in=names)
+                .order_by('-id').values_list('name', 'id')
+            )
+            self.projects.update(found)
+        usernames = {_value(row, 'assigned_to') for row in rows} - self.users.keys() - {''}
+        if usernames:
+            self.users.update(dict.fromkeys(usernames))
+            self.users.update(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+
+        missing = sorted(names - self.projects.keys())
+        if missing and self.create_projects:
+            created = Project.objects.bulk_create(
+                [Project(name=name, created_by=self.user) for name in missing]
+            )
+            self.projects.update((name, project.pk) for name, project in zip(missing, created))
+            self.result.projects_created += len(created)
+
+    def build_issue(self, row):
+        """An unsaved Issue for a row, or an error message"""
+        if row is None:
+            return 'not a JSON object'
+        title = _value(row, 'title')
+        if not title:
+            return 'title is required'
+        if len(title) > _TITLE_LENGTH:
+            return f'title is longer than {_TITLE_LENGTH} characters'
+        project = _project_name(row)
+        if not project:
+            return 'project is required'
+        if project not in self.projects:
+            return f'unknown project "{project}"'
+        priority = _PRIORITIES.get((_value(row, 'priority') or 'Medium').lower())
+        if priority is None:
+            return f'invalid priority "{_value(row, "priority")}"'
+        status = _STATUSES.get((_value(row, 'status') or 'Open').lower())
+        if status is None:
+            return f'invalid status "{_value(row, "status")}"'
+        assigned_to = _value(row, 'assigned_to')
+        if assigned_to and self.users.get(assigned_to) is None:
+            return f'unknown user "{assigned_to}"'
+
+        return Issue(
+            title=title,
+            description=_value(row, 'description'),
+            project_id=self.projects[project],
+            priority=priority,
+            status=status,
+            assigned_to_id=self.users.get(assigned_to),
+            created_by=self.user,
+        )
+
+    def import_batch(self, batch):
+        with transaction.atomic():
+            self.resolve(batch)
+            issues = []
+            for number, row in batch:
+                issue = self.build_issue(row)
+                if isinstance(issue, str):
+                    self.result.errors.append((number, issue))
+                else:
+                    issues.append(issue)
+            created = Issue.objects.bulk_create(issues)
+            count_created(created)
+            search.index_objects(created)
+        self.result.created += len(created)
+
+
+def import_issues(fileobj, user, fmt='csv', batch_size=None, create_projects=True):
+    """Import issues for a user from a binary CSV or NDJSON stream"""
+    importer = IssueImporter(user, batch_size, create_projects)
+    return importer.run(iter_rows(fileobj, fmt))
+
+
+class _Echo:
+    """File-like object whose write() hands the formatted line back"""
+
+    def write(self, value):
+        return value
+
+
+def _export_value(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def export_issues(queryset, fmt='csv', chunk_size=None):
+    """Yield an Issue queryset as CSV or NDJSON text, a few hundred rows per chunk"""
+    if fmt not in FORMATS:
+        raise ImportFormatError(f'Unsupported format: {fmt}')
+    chunk_size = chunk_size or getattr(settings, 'ISSUE_EXPORT_CHUNK_SIZE', 2000)
+    rows = queryset.order_by('id').values_list(*_EXPORT_COLUMNS).iterator(chunk_size=chunk_size)
+
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(EXPORT_FIELDS)
+        format_row = writer.writerow
+    else:
+        def format_row(row):
+            return json.dumps(dict(zip(EXPORT_FIELDS, row))) + '\n'
+
+    for chunk in _chunks(rows, 500):
+        yield ''.join(format_row([_export_value(value) for value in row]) for row in chunk)
@@ -1,5 +1,6 @@
-from django.urls import path
-from . import views
+from django.conf import settings
+from django.urls import include, path
+from . import api, instrumentation, views
 
 app_name = 'issues'
 
@@ -7,13 +8,28 @@ urlpatterns = [
     path('dashboard/', views.dashboard, name='dashboard'),
     
     # Code Paste URLs
-    path('paste-code/', views.paste_code, name='paste_code'), 
+    path('paste-code/', views.paste_code_async if settings.ASYNC_VIEWS else views.paste_code, name='paste_code'),
+    path('paste-code/stream/', views.paste_code_stream, name='paste_code_stream'),
     path('my-code/', views.my_code_list, name='my_code_list'),
-    path('code/<int:snippet_id>/', views.code_results, name='code_results'),
+    path(
+        'code/<int:snippet_id>/',
+        views.code_results_async if settings.ASYNC_VIEWS else views.code_results,
+        name='code_results',
+    ),
+    path('code/<int:snippet_id>/edit/', views.code_edit, name='code_edit'),
+    path('code/<int:snippet_id>/status/', views.code_results_status, name='code_results_status'),
+    path('code/<int:snippet_id>/events/', views.code_results_events, name='code_results_events'),
+    path('upload-archive/', views.upload_archive, name='upload_archive'),
+    path('archives/<int:archive_id>/', views.archive_results, name='archive_results'),
     
     
     path('projects/', views.project_list, name='project_list'),
     path('projects/create/', views.project_create, name='project_create'),
     path('issues/', views.issue_list, name='issue_list'),
     path('issues/create/', views.issue_create, name='issue_create'),
+    path('issues/import/', views.issue_import, name='issue_import'),
+    path('issues/export/', views.issue_export, name='issue_export'),
+    path('search/', views.search_view, name='search'),
+    path('api/', include(api.router.urls)),
+    path('metrics', instrumentation.metrics_view, name='metrics'),
 ]
\ No newline at end of file
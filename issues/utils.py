@@ -1,66 +1,117 @@
+import codecs
 import re
 import openai
 from django.conf import settings
 
+from .analysis_cache import analysis_cache, cache_key, cached_analysis
+from .analyzers import get_analyzer
+from .profiling import AnalysisProfile
+from .rules import PYTHON_RULES, count_lines
+from .sandbox import BudgetedResult, analyze_budgeted, analyze_with_deadline
+
 def analyze_python_code_basic(code):
     """
     Basic Python code analysis using pattern matching
     Returns: list of issues found
     """
-    issues = []
-    lines = code.split('\n')
-    
-    for i, line in enumerate(lines, 1):
-        line = line.strip()
-        
-        # Skip empty lines and comments
-        if not line or line.startswith('#'):
-            continue
-            
-        # Check for common Python issues
-        checks = [
-            {
-                'pattern': r'print\s+[^\(]',
-                'type': 'Python 2 Syntax',
-                'description': 'print statement without parentheses',
-                'severity': 'medium',
-                'fix': lambda l: re.sub(r'print\s+([^\(].*)', r'print(\1)', l)
-            },
-            {
-                'pattern': r'==\s*None|\!=\s*None',
-                'type': 'None Comparison',
-                'description': 'Use "is" or "is not" for None comparisons',
-                'severity': 'low',
-                'fix': lambda l: l.replace(' == None', ' is None').replace(' != None', ' is not None')
-            },
-            {
-                'pattern': r'except:',
-                'type': 'Bare Except',
-                'description': 'Bare except clause - specify exception type',
-                'severity': 'medium',
-                'fix': lambda l: l.replace('except:', 'except Exception:')
-            }
-        ]
-        
-        for check in checks:
-            if re.search(check['pattern'], line):
-                issues.append({
-                    'line_number': i,
-                    'issue_type': check['type'],
-                    'description': check['description'],
-                    'severity': check['severity'],
-                    'suggested_fix': check['fix'](line),
-                    'original_line': line
-                })
-                break
-    
-    return issues
+    return PYTHON_RULES.scan(code)
 
 def analyze_code(code, language='python', use_ai=False):
     """
-    Main analysis function - uses basic analysis for now
+    Main analysis function - runs the language's registered analyzer.
+    Results are cached by code hash, language and ruleset version.
+    """
+    return cached_analysis(code, language, analyze_code_uncached)
+
+def analyze_code_budgeted(code, language='python', on_progress=None, profile=False, in_process=False):
+    """
+    analyze_code() for untrusted input: runs in a worker process within
+    the time and CPU budgets (see issues/sandbox.py) and returns a
+    BudgetedResult. Only complete results are cached. With
+    in_process=True it runs in this process under analyze_with_deadline()
+    instead, which has no CPU limit and reports no progress or profile
+    while running. on_progress, if
+    given, is called with the number of lines analyzed so far and the
+    findings among them not reported before (all of them at once for a
+    cached result). With
+    profile=True the result carries the run's AnalysisProfile (empty for
+    a cached result).
     """
-    if language == 'python':
-        return analyze_python_code_basic(code)
+    key = cache_key(code, language)
+    cached = analysis_cache.get(key)
+    if cached is not None:
+        result = BudgetedResult(
+            [dict(issue) for issue in cached], analyzed_lines=count_lines(code),
+            profile=AnalysisProfile() if profile else None,
+        )
+        if on_progress is not None:
+            on_progress(result.analyzed_lines, result.issues)
+        return result
+    if in_process:
+        result = analyze_with_deadline(code, language)
     else:
-        return []
\ No newline at end of file
+        result = analyze_budgeted(code, language, on_progress=on_progress, profile=profile)
+    if not result.truncated:
+        analysis_cache.set(key, result.issues)
+    return result
+
+def analyze_code_chunks(code, language='python', on_chunk=None):
+    """
+    analyze_code() calling on_chunk(lines analyzed, findings) as each
+    chunk of ANALYSIS_BUDGET_CHUNK_LINES lines is done (once, with all
+    the findings, for a cached result)
+    """
+    key = cache_key(code, language)
+    issues = analysis_cache.get(key)
+    if issues is not None:
+        issues = [dict(issue) for issue in issues]
+        if on_chunk is not None:
+            on_chunk(count_lines(code), issues)
+        return issues
+
+    issues = []
+    analyzer = get_analyzer(language)
+    if analyzer is not None:
+        for analyzed, findings in analyzer.analyze_chunks(code, getattr(settings, 'ANALYSIS_BUDGET_CHUNK_LINES', 1000)):
+            issues.extend(findings)
+            if on_chunk is not None:
+                on_chunk(analyzed, findings)
+    analysis_cache.set(key, issues)
+    return [dict(issue) for issue in issues]
+
+def analyze_code_uncached(code, language='python'):
+    """Run the analyzer for a language, bypassing the result cache"""
+    analyzer = get_analyzer(language)
+    if analyzer is None:
+        return []
+    return analyzer.analyze(code)
+
+def iter_lines(source):
+    """
+    Lazily split source into lines. Accepts a string, an iterable of
+    lines or a text/binary file-like object; bytes are decoded as UTF-8.
+    """
+    if isinstance(source, str):
+        start = 0
+        while True:
+            end = source.find('\n', start)
+            if end == -1:
+                yield source[start:]
+                return
+            yield source[start:end]
+            start = end + 1
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    for line in source:
+        if isinstance(line, bytes):
+            line = decoder.decode(line)
+        yield line.rstrip('\n')
+
+def analyze_code_stream(source, language='python'):
+    """
+    Streaming analysis: yields findings one at a time while reading the
+    source line by line. Uses the line-based rules, since a syntax tree
+    needs the whole file.
+    """
+    analyzer = get_analyzer(language)
+    if analyzer is not None:
+        yield from analyzer.scan_lines(iter_lines(source))
@@ -1,32 +1,55 @@
-from django.shortcuts import render, redirect, get_object_or_404
+import asyncio
+import json
+import time
+import zipfile
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Count
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from .models import Project, Issue
 # from .utils import analyze_python_code
-from .models import CodeSnippet, CodeIssue
-from .utils import analyze_code
+from .models import CodeArchive, CodeSnippet, CodeIssue
+from .archives import ArchiveError, analyze_archive
+from . import analyzers, events, search
+from .filters import filter_issues, issue_filters
+from .incremental import reanalyze_snippet
+from .jobs import enqueue_analysis, start_analysis_async
+from .pagination import paginate
+from .persistence import ISSUE_FIELDS
+from .replicas import read_from_replica
+from .sandbox import LineGuard
+from .stats import get_content_version, get_dashboard_stats
+from .transfer import FORMATS, ImportFormatError, detect_format, export_issues, import_issues
+from .utils import analyze_code, analyze_code_stream, iter_lines
 
 
 @login_required
+@read_from_replica
 def dashboard(request):
     """Dashboard view - shows overview"""
-    user_projects = Project.objects.filter(created_by=request.user)
-    user_issues = Issue.objects.filter(created_by=request.user)
-    
     context = {
-        'projects': user_projects,
-        'issues': user_issues,
-        'total_projects': user_projects.count(),
-        'total_issues': user_issues.count(),
-        'open_issues': user_issues.filter(status='Open').count(),
+        'projects': Project.objects.filter(created_by=request.user).order_by('-created_at')[:5],
+        'issues': (
+            Issue.objects.filter(created_by=request.user)
+            .select_related('project')
+            .order_by('-created_at')[:5]
+        ),
+        'content_version': get_content_version(request.user),
+        **get_dashboard_stats(request.user),
     }
     return render(request, 'issues/dashboard.html', context)
 
 @login_required
+@read_from_replica
 def project_list(request):
     """List all projects for current user"""
     projects = Project.objects.filter(created_by=request.user)
-    return render(request, 'issues/project_list.html', {'projects': projects})
+    return render(request, 'issues/project_list.html', paginate(request, projects))
 
 @login_required
 def project_create(request):
@@ -47,10 +70,24 @@ def project_create(request):
     return render(request, 'issues/project_create.html')
 
 @login_required
+@read_from_replica
 def issue_list(request):
     """List all issues for current user"""
-    issues = Issue.objects.filter(created_by=request.user)
-    return render(request, 'issues/issue_list.html', {'issues': issues})
+    filters = issue_filters(request)
+    issues = filter_issues(
+        Issue.objects.filter(created_by=request.user).select_related('project'), filters
+    )
+
+    context = paginate(request, issues, filters)
+    context.update({
+        'filters': filters,
+        'filter_query': urlencode(filters),
+        'projects': Project.objects.filter(created_by=request.user).values_list('id', 'name'),
+        'status_choices': Issue.STATUS_CHOICES,
+        'priority_choices': Issue.PRIORITY_CHOICES,
+        'stats': get_dashboard_stats(request.user),
+    })
+    return render(request, 'issues/issue_list.html', context)
 
 @login_required
 def issue_create(request):
@@ -133,6 +170,82 @@ def issue_create(request):
 
 
 
+@login_required
+def issue_import(request):
+    """Bulk-create issues from an uploaded CSV or NDJSON file"""
+    if request.method == 'POST':
+        upload = request.FILES.get('issues_file')
+        if not upload:
+            messages.error(request, 'Please choose a CSV or NDJSON file to import!')
+        else:
+            fmt = request.POST.get('format') or detect_format(upload.name)
+            try:
+                result = import_issues(
+                    upload, request.user, fmt, create_projects=bool(request.POST.get('create_projects')),
+                )
+            except ImportFormatError as e:
+                messages.error(request, f'Could not read the file: {e}')
+            else:
+                if result.failure and not result.created:
+                    messages.error(request, f'Could not read the file: {result.failure}')
+                    return render(request, 'issues/issue_import.html', {'formats': FORMATS})
+                messages.success(
+                    request,
+                    f'Imported {result.created} issue(s) and created {result.projects_created} project(s)!'
+                )
+                for number, error in result.errors[:10]:
+                    messages.warning(request, f'Row {number}: {error}')
+                if len(result.errors) > 10:
+                    messages.warning(request, f'...and {len(result.errors) - 10} more rows were skipped.')
+                if result.failure:
+                    messages.error(
+                        request,
+                        f'Could not read the rest of the file: {result.failure}. '
+                        f'The {result.created} issue(s) before that were imported.'
+                    )
+                return redirect('issue_list')
+
+    return render(request, 'issues/issue_import.html', {'formats': FORMATS})
+
+@login_required
+def issue_export(request):
+    """Stream the (filtered) issue list as CSV or NDJSON"""
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in FORMATS:
+        fmt = 'csv'
+    issues = filter_issues(Issue.objects.filter(created_by=request.user), issue_filters(request))
+    response = StreamingHttpResponse(
+        export_issues(issues, fmt),
+        content_type='text/csv' if fmt == 'csv' else 'application/x-ndjson',
+    )
+    response['Content-Disposition'] = f'attachment; filename="issues.{fmt}"'
+    return response
+
+@login_required
+def search_view(request):
+    """Ranked full-text search over the user's issues, comments and code"""
+    query = request.GET.get('q', '').strip()
+    try:
+        page_number = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page_number = 1
+    per_page = 20
+
+    hits = []
+    if query:
+        # Fetch one extra hit to know whether there is a next page
+        hits = search.search(request.user, query, limit=per_page + 1, offset=(page_number - 1) * per_page)
+    has_next = len(hits) > per_page
+
+    return render(request, 'issues/search.html', {
+        'query': query,
+        'hits': hits[:per_page],
+        'page_number': page_number,
+        'has_next': has_next,
+        'next_query': urlencode({'q': query, 'page': page_number + 1}),
+        'previous_query': urlencode({'q': query, 'page': page_number - 1}),
+    })
+
 @login_required
 def paste_code(request):
     """View for pasting and analyzing code - FIXED"""
@@ -143,21 +256,20 @@ def paste_code(request):
             language = request.POST.get('language', 'python')
             
             if title and code_content:
-                # Basic analysis
-                if language == 'python':
-                    issues_found = analyze_python_code_basic(code_content)
-                    messages.success(request, f'Found {len(issues_found)} issues in your Python code!')
-                    
-                    # SHOW RESULTS ON SAME PAGE (instead of redirect)
-                    return render(request, 'issues/code_paste.html', {
-                        'analysis_results': issues_found,
-                        'code_content': code_content,
-                        'title': title,
-                        'language': language
-                    })
+                if language in analyzers.registry.languages():
+                    snippet = CodeSnippet.objects.create(
+                        title=title,
+                        code=code_content,
+                        language=language,
+                        description=request.POST.get('description', ''),
+                        created_by=request.user
+                    )
+                    # Analysis runs in the background; code_results follows its events
+                    enqueue_analysis(snippet, use_ai=bool(request.POST.get('use_ai')))
+                    messages.success(request, 'Code submitted! Analysis is running...')
+                    return redirect('code_results', snippet_id=snippet.id)
                 else:
-                    messages.info(request, f'Code submitted! {language} analysis coming soon.')
-                    return redirect('dashboard')
+                    messages.error(request, f'No analyzer is available for {language}.')
             else:
                 messages.error(request, 'Title and code content are required!')
         
@@ -168,89 +280,258 @@ def paste_code(request):
         messages.error(request, f'An error occurred: {str(e)}')
         return render(request, 'issues/code_paste.html')
 
+@login_required
+def paste_code_stream(request):
+    """
+    Analyze an uploaded file (or pasted code) and stream the findings
+    back as NDJSON while the file is still being read.
+    """
+    if request.method != 'POST':
+        return render(request, 'issues/code_stream.html')
+
+    language = request.POST.get('language', 'python')
+    source = request.FILES.get('code_file') or request.POST.get('code', '')
+
+    def stream():
+        count = 0
+        # Overlong lines are skipped and the stream ends at the time budget
+        guard = LineGuard(iter_lines(source))
+        for finding in analyze_code_stream(guard, language):
+            count += 1
+            yield json.dumps(finding) + '\n'
+        yield json.dumps({
+            'done': True, 'issues_count': count, 'truncated': guard.truncated, 'lines': guard.line_count,
+        }) + '\n'
+
+    return StreamingHttpResponse(stream(), content_type='application/x-ndjson')
+
+@login_required
+def upload_archive(request):
+    """Analyze every source file in an uploaded zip or tarball"""
+    if request.method == 'POST':
+        upload = request.FILES.get('archive')
+        title = request.POST.get('title') or (upload.name if upload else '')
+        if not upload:
+            messages.error(request, 'Please choose a zip or tar archive to upload!')
+        else:
+            try:
+                archive = analyze_archive(upload, title, request.user)
+            except (ArchiveError, zipfile.BadZipFile) as e:
+                messages.error(request, str(e))
+            else:
+                messages.success(
+                    request,
+                    f'Analyzed {archive.file_count} file(s) and found {archive.issue_count} issue(s)!'
+                )
+                return redirect('archive_results', archive_id=archive.id)
+
+    return render(request, 'issues/archive_upload.html')
+
+@login_required
+def archive_results(request, archive_id):
+    """Per-file results for an analyzed archive"""
+    archive = get_object_or_404(CodeArchive, id=archive_id, created_by=request.user)
+    snippets = (
+        archive.snippets.annotate(issues_count=Count('codeissue'))
+        .only('id', 'title', 'language')
+        .order_by('title')
+    )
+    return render(request, 'issues/archive_results.html', {
+        'archive': archive,
+        'snippets': snippets,
+    })
+
 @login_required
 def code_results(request, snippet_id):
     """Show analysis results for a code snippet"""
     snippet = get_object_or_404(CodeSnippet, id=snippet_id, created_by=request.user)
-    issues = CodeIssue.objects.filter(snippet=snippet)
+    issues = CodeIssue.objects.filter(snippet=snippet).order_by('line_number', 'id')
     
     return render(request, 'issues/code_results.html', {
         'snippet': snippet,
         'issues': issues,
-        'issues_count': issues.count()
+        'issues_count': issues.count(),
+        'job': snippet.jobs.order_by('-created_at').first(),
     })
 
+@login_required
+def code_edit(request, snippet_id):
+    """Edit a snippet's code and re-analyze only what changed"""
+    snippet = get_object_or_404(CodeSnippet, id=snippet_id, created_by=request.user)
+    if request.method == 'POST':
+        code = request.POST.get('code', '')
+        if not code.strip():
+            messages.error(request, 'Please provide some code to analyze!')
+        else:
+            result = reanalyze_snippet(snippet, code)
+            if result.incremental:
+                messages.success(
+                    request,
+                    f'Re-checked {result.checked_lines} changed line(s): '
+                    f'{result.created} new issue(s), {result.deleted} resolved.'
+                )
+            return redirect('code_results', snippet_id=snippet.id)
+
+    return render(request, 'issues/code_edit.html', {'snippet': snippet})
 
-import re
+@login_required
+def code_results_status(request, snippet_id):
+    """
+    JSON status of a snippet's analysis for polling clients. It answers
+    at once; while the analysis runs the response carries Retry-After,
+    and clients should back off rather than poll in a tight loop (or
+    follow code_results_events instead).
 
-def analyze_code(code, language='python'):
-    """Basic code analysis function"""
-    if language == 'python':
-        return analyze_python_code_basic(code)
-    return []
+    `truncated` is always a string: '' for a complete analysis, otherwise
+    why it stopped early ('timeout', 'cpu' or 'line_length'); how far it
+    got is `analyzed_lines`. With DEBUG on, profiled jobs include their
+    per-rule breakdown.
+    """
+    snippet = get_object_or_404(CodeSnippet, id=snippet_id, created_by=request.user)
+    job = snippet.jobs.order_by('-created_at').first()
+    finished = snippet.analyzed or (job is not None and job.status == 'failed')
 
-def analyze_python_code_basic(code):
-    """Enhanced Python code analysis"""
-    issues = []
-    lines = code.split('\n')
-    
-    for i, line in enumerate(lines, 1):
-        line = line.strip()
-        if not line or line.startswith('#'):
-            continue
-            
-        # Check for multiple issues per line
-        checks = [
-            # Python 2 print syntax
-            {
-                'pattern': r'print\s+[^\(]',
-                'type': 'Python 2 Syntax',
-                'description': 'print statement without parentheses (Python 2 style)',
-                'severity': 'medium',
-                'fix': lambda l: re.sub(r'print\s+([^\(].*)', r'print(\1)', l)
-            },
-            # None comparison
-            {
-                'pattern': r'==\s*None|\!=\s*None',
-                'type': 'None Comparison',
-                'description': 'Use "is" or "is not" for None comparisons (PEP 8)',
-                'severity': 'low',
-                'fix': lambda l: l.replace(' == None', ' is None').replace(' != None', ' is not None')
-            },
-            # Bare except
-            {
-                'pattern': r'^\s*except:',
-                'type': 'Bare Except Clause',
-                'description': 'Bare except clause - specify exception type',
-                'severity': 'medium',
-                'fix': lambda l: l.replace('except:', 'except Exception:')
-            },
-            # Old style class
-            {
-                'pattern': r'^class\s+\w+[^\(]:',
-                'type': 'Old-style Class',
-                'description': 'Use new-style classes (inherit from object)',
-                'severity': 'low',
-                'fix': lambda l: l.replace(':', '(object):')
-            }
-        ]
-        
-        for check in checks:
-            if re.search(check['pattern'], line):
-                issues.append({
-                    'line_number': i,
-                    'issue_type': check['type'],
-                    'description': check['description'],
-                    'severity': check['severity'],
-                    'suggested_fix': check['fix'](line),
-                    'original_line': line
-                })
-                break  
-    
-    return issues
+    data = {
+        'analyzed': snippet.analyzed,
+        'status': job.status if job else None,
+        'error': job.error if job else '',
+        'issues_count': CodeIssue.objects.filter(snippet=snippet).count() if snippet.analyzed else None,
+        'truncated': job.truncated if job else '',
+        'analyzed_lines': job.analyzed_lines if job else None,
+    }
+    if settings.DEBUG and job is not None and job.profile:
+        data['profile'] = job.profile
+    response = JsonResponse(data)
+    if not finished:
+        response['Retry-After'] = str(getattr(settings, 'ANALYSIS_STATUS_RETRY_AFTER', 2))
+    return response
+
+def _stored_events(snippet):
+    """A finished analysis replayed from the database, or [] while it's still running"""
+    job = snippet.jobs.order_by('-created_at').first()
+    if job is not None and job.status == 'failed':
+        return [events.Event(0, events.DONE, {
+            'status': 'failed', 'issues_count': None, 'error': job.error, 'truncated': '',
+        })]
+    if not (job.status == 'done' if job is not None else snippet.analyzed):
+        return []
+    issues = list(CodeIssue.objects.filter(snippet=snippet).order_by('line_number', 'id').values(*ISSUE_FIELDS))
+    return [events.Event(0, events.FINDING, issue) for issue in issues] + [events.Event(0, events.DONE, {
+        'status': 'done', 'issues_count': len(issues), 'error': job.error if job else '',
+        'truncated': job.truncated if job else '',
+    })]
+
+def _snippet_event_stream(snippet, last_event_id):
+    with events.broker.subscribe(snippet.pk, last_event_id) as subscription:
+        yield 'retry: 3000\n\n'
+        pending = subscription.backlog or _stored_events(snippet)
+        deadline = time.monotonic() + getattr(settings, 'ANALYSIS_EVENTS_TIMEOUT', 300)
+        while True:
+            for event in pending:
+                yield event.encode()
+                if event.name == events.DONE:
+                    return
+            if time.monotonic() >= deadline:
+                return
+            event = subscription.get(timeout=getattr(settings, 'ANALYSIS_EVENTS_HEARTBEAT', 15))
+            if event is None:
+                # Quiet for a while: maybe another process ran the job
+                yield ': keep-alive\n\n'
+                pending = _stored_events(snippet)
+            else:
+                pending = [event]
+
+async def _snippet_event_stream_async(snippet, last_event_id):
+    subscription = events.broker.subscribe(snippet.pk, last_event_id, loop=asyncio.get_running_loop())
+    async with subscription:
+        yield 'retry: 3000\n\n'
+        pending = subscription.backlog or await sync_to_async(_stored_events)(snippet)
+        deadline = time.monotonic() + getattr(settings, 'ANALYSIS_EVENTS_TIMEOUT', 300)
+        while True:
+            for event in pending:
+                yield event.encode()
+                if event.name == events.DONE:
+                    return
+            if time.monotonic() >= deadline:
+                return
+            event = await subscription.aget(timeout=getattr(settings, 'ANALYSIS_EVENTS_HEARTBEAT', 15))
+            if event is None:
+                yield ': keep-alive\n\n'
+                pending = await sync_to_async(_stored_events)(snippet)
+            else:
+                pending = [event]
 
 @login_required
+def code_results_events(request, snippet_id):
+    """
+    Server-sent events for a snippet's analysis: `progress` percentages,
+    each `finding` as soon as it is found, then `done`. Events come from
+    issues.events rather than database polling; an analysis that already
+    finished is replayed from the database. Reconnecting clients resume
+    after their Last-Event-ID. With ASYNC_VIEWS on, waiting streams hold
+    no thread.
+    """
+    snippet = get_object_or_404(CodeSnippet, id=snippet_id, created_by=request.user)
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        last_event_id = None
+    stream = _snippet_event_stream_async if settings.ASYNC_VIEWS else _snippet_event_stream
+    response = StreamingHttpResponse(stream(snippet, last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+@read_from_replica
 def my_code_list(request):
     """List all code snippets for current user"""
-    snippets = CodeSnippet.objects.filter(created_by=request.user).order_by('-created_at')
-    return render(request, 'issues/my_code_list.html', {'snippets': snippets})
\ No newline at end of file
+    snippets = CodeSnippet.objects.filter(created_by=request.user).defer('code')
+    return render(request, 'issues/my_code_list.html', paginate(request, snippets))
+
+# Async variants for ASGI deployments (ASYNC_VIEWS = True). Analysis runs
+# as a task on the event loop: the AI request is awaited there and the
+# rule analysis runs on a bounded thread pool, so it holds no thread while
+# it waits. The user is loaded up front so templates never query from the loop.
+
+@login_required
+async def paste_code_async(request):
+    """paste_code for ASGI; redirects to the results while the analysis runs"""
+    request.user = await request.auser()
+    if request.method == 'POST':
+        title = request.POST.get('title')
+        code_content = request.POST.get('code')
+        language = request.POST.get('language', 'python')
+
+        if not (title and code_content):
+            messages.error(request, 'Title and code content are required!')
+        elif language not in analyzers.registry.languages():
+            messages.error(request, f'No analyzer is available for {language}.')
+        else:
+            snippet = await CodeSnippet.objects.acreate(
+                title=title,
+                code=code_content,
+                language=language,
+                description=request.POST.get('description', ''),
+                created_by=request.user,
+            )
+            await start_analysis_async(snippet, use_ai=bool(request.POST.get('use_ai')))
+            messages.success(request, 'Code submitted! Analysis is running...')
+            return redirect('code_results', snippet_id=snippet.id)
+
+    return render(request, 'issues/code_paste.html')
+
+@login_required
+async def code_results_async(request, snippet_id):
+    """code_results for ASGI"""
+    request.user = await request.auser()
+    snippet = await aget_object_or_404(CodeSnippet, id=snippet_id, created_by=request.user)
+    issues = [issue async for issue in CodeIssue.objects.filter(snippet=snippet).order_by('line_number', 'id')]
+
+    return render(request, 'issues/code_results.html', {
+        'snippet': snippet,
+        'issues': issues,
+        'issues_count': len(issues),
+        'job': await snippet.jobs.order_by('-created_at').afirst(),
+    })